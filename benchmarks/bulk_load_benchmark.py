@@ -0,0 +1,113 @@
+"""Load time of a full catalog: multi-values INSERT vs executemany upsert vs COPY upsert.
+
+Uses the test database from .env, its tables are recreated for every run.
+
+Usage: python -m benchmarks.bulk_load_benchmark [dishes ...]
+(default: 10000 100000 1000000)
+"""
+import asyncio
+import sys
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.config import (
+    TEST_DB_HOST,
+    TEST_DB_NAME,
+    TEST_DB_PASS,
+    TEST_DB_PORT,
+    TEST_DB_USER,
+)
+from src.database import Base
+from src.task import tasks
+
+DISHES_PER_SUBMENU = 10
+SUBMENUS_PER_MENU = 10
+
+TEST_DATABASE_URL = (
+    f'postgresql+asyncpg://'
+    f'{TEST_DB_USER}:{TEST_DB_PASS}@{TEST_DB_HOST}:{TEST_DB_PORT}/{TEST_DB_NAME}'
+)
+bench_engine = create_async_engine(TEST_DATABASE_URL)
+bench_async_session = async_sessionmaker(bench_engine)
+
+Loader = Callable[[AsyncSession, Any, tuple[str, ...], list[dict[str, Any]]], Awaitable[None]]
+
+
+def generate_rows(dishes: int) -> dict[str, list[dict[str, Any]]]:
+    """Generate rows of a catalog with the given number of dishes."""
+    rows: dict[str, list[dict[str, Any]]] = {key: [] for key in tasks.MODELS}
+    for d in range(dishes):
+        if d % (DISHES_PER_SUBMENU * SUBMENUS_PER_MENU) == 0:
+            menu_id = uuid.uuid4()
+            rows['menus'].append({'id': menu_id, 'title': f'menu {d}', 'description': 'desc'})
+        if d % DISHES_PER_SUBMENU == 0:
+            submenu_id = uuid.uuid4()
+            rows['submenus'].append({
+                'id': submenu_id, 'title': f'submenu {d}', 'description': 'desc', 'menu_id': menu_id
+            })
+        rows['dishes'].append({
+            'id': uuid.uuid4(), 'title': f'dish {d}', 'description': 'desc',
+            'price': Decimal('182.99'), 'submenu_id': submenu_id, 'discount': None
+        })
+    return rows
+
+
+async def insert_values(session: AsyncSession, model: Any, columns: tuple[str, ...],
+                        rows: list[dict[str, Any]]) -> None:
+    """Former path: one multi-values INSERT statement per table."""
+    await session.execute(insert(model).values(rows))
+
+
+async def executemany_upsert(session: AsyncSession, model: Any, columns: tuple[str, ...],
+                             rows: list[dict[str, Any]]) -> None:
+    await tasks._upsert(session, model, columns, rows)
+
+
+async def copy_upsert(session: AsyncSession, model: Any, columns: tuple[str, ...],
+                      rows: list[dict[str, Any]]) -> None:
+    await tasks._copy_upsert(session, model.__tablename__, columns, rows)
+
+
+async def measure(loader: Loader, rows: dict[str, list[dict[str, Any]]]) -> str:
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    start = time.perf_counter()
+    try:
+        async with bench_async_session() as session:
+            for key, model in tasks.MODELS.items():
+                await loader(session, model, tasks.COLUMNS[key], rows[key])
+            await session.commit()
+    except Exception as error:
+        return f'failed: {type(error).__name__}'
+    return f'{time.perf_counter() - start:.2f} s'
+
+
+async def main(sizes: list[int]) -> None:
+    tasks.BULK_LOAD_THRESHOLD = sys.maxsize
+    loaders: dict[str, Loader] = {
+        'insert values': insert_values,
+        'executemany upsert': executemany_upsert,
+        'COPY upsert': copy_upsert,
+    }
+
+    print(f'{"dishes":>8} ' + ' '.join(f'{name:>22}' for name in loaders))
+    for dishes in sizes:
+        rows = generate_rows(dishes)
+        results = [await measure(loader, rows) for loader in loaders.values()]
+        print(f'{dishes:>8} ' + ' '.join(f'{result:>22}' for result in results))
+
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await bench_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main([int(size) for size in sys.argv[1:]] or [10_000, 100_000, 1_000_000]))
@@ -0,0 +1,100 @@
+"""Stored size and read latency of cached "full" and "db_data" payloads
+in redis with every available compression codec.
+
+Payloads are generated in the shape the app stores them: "full" is the JSON
+body of /api/v1/all_data, "db_data" is the pickled catalog snapshot of the
+Excel synchronization. Stored size is the value length in redis, it is what
+every read moves over the network. Read latency includes GET, decompression
+and deserialization. Uses the test redis from .env, it is flushed.
+
+Usage: python -m benchmarks.cache_compression_benchmark [reads]
+(default: 20)
+"""
+import asyncio
+import json
+import pickle
+import statistics
+import sys
+import time
+import uuid
+from collections.abc import Callable
+from decimal import Decimal
+from typing import Any
+
+from redis.asyncio import Redis
+
+from src.cache.compression import CODECS, Compressor
+from src.config import TEST_REDIS_HOST, TEST_REDIS_PORT
+
+DISH_COUNTS = [10_000, 100_000]
+DISHES_PER_SUBMENU = 10
+SUBMENUS_PER_MENU = 10
+
+bench_redis = Redis(host=TEST_REDIS_HOST, port=TEST_REDIS_PORT, db=0)
+
+
+def generate_payloads(dishes: int) -> dict[str, tuple[bytes, Callable[[bytes], Any]]]:
+    """Generate serialized "full" and "db_data" payloads of a catalog
+    with the given number of dishes and their deserializers."""
+    full: list[dict] = []
+    db_data: dict[str, dict] = {'menus': {}, 'submenus': {}, 'dishes': {}}
+    for m in range(dishes // DISHES_PER_SUBMENU // SUBMENUS_PER_MENU):
+        menu_id = uuid.uuid4()
+        db_data['menus'][menu_id] = (f'menu {m}', 'menu description')
+        submenus_list = []
+        for s in range(SUBMENUS_PER_MENU):
+            submenu_id = uuid.uuid4()
+            db_data['submenus'][submenu_id] = (f'submenu {m}.{s}', 'submenu description', menu_id)
+            dishes_list = []
+            for d in range(DISHES_PER_SUBMENU):
+                dish_id = uuid.uuid4()
+                db_data['dishes'][dish_id] = (
+                    f'dish {m}.{s}.{d}', 'dish description', Decimal('182.99'), submenu_id, None
+                )
+                dishes_list.append({
+                    'id': str(dish_id), 'title': f'dish {m}.{s}.{d}',
+                    'description': 'dish description', 'price': '182.99'
+                })
+            submenus_list.append({
+                'id': str(submenu_id), 'title': f'submenu {m}.{s}',
+                'description': 'submenu description', 'dishes_list': dishes_list
+            })
+        full.append({
+            'id': str(menu_id), 'title': f'menu {m}', 'description': 'menu description',
+            'submenus_list': submenus_list
+        })
+    return {
+        'full': (json.dumps(full, separators=(',', ':')).encode(), bytes),
+        'db_data': (pickle.dumps(db_data), pickle.loads),
+    }
+
+
+async def main(reads: int) -> None:
+    await bench_redis.flushdb()
+    print(
+        f'{"dishes":>7} {"key":>8} {"codec":>6} {"stored KB":>10} {"ratio":>6} '
+        f'{"write ms":>9} {"read ms":>8}'
+    )
+    for dishes in DISH_COUNTS:
+        for key, (payload, loads) in generate_payloads(dishes).items():
+            for codec in ('none', *CODECS):
+                compressor = Compressor(codec, min_size=0)
+                start = time.perf_counter()
+                await bench_redis.set(key, compressor.encode(payload))
+                write_ms = (time.perf_counter() - start) * 1000
+                stored = await bench_redis.strlen(key)
+
+                timings = []
+                for _ in range(reads):
+                    start = time.perf_counter()
+                    loads(compressor.decode(await bench_redis.get(key)))
+                    timings.append((time.perf_counter() - start) * 1000)
+                print(
+                    f'{dishes:>7} {key:>8} {codec:>6} {stored / 1024:>10.0f} '
+                    f'{len(payload) / stored:>6.1f} {write_ms:>9.1f} {statistics.median(timings):>8.1f}'
+                )
+    await bench_redis.flushdb()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
@@ -0,0 +1,159 @@
+"""Requests per second of cached /menus and /all_data responses.
+
+Runs the app in process through httpx ASGI transport with the test database
+and redis from .env, tables are recreated and filled with a generated catalog.
+
+With --compare the cache hit of both endpoints is also timed in the old flow
+(pickled response models are unpickled, validated by the response model and
+encoded to JSON by JSONResponse) and in the current flow (stored JSON body is
+returned as it is) against the same data, printed side by side.
+
+Usage: python -m benchmarks.cached_response_benchmark [requests] [--compare]
+(default: 2000)
+"""
+import asyncio
+import pickle
+import sys
+import time
+import uuid
+from collections.abc import AsyncGenerator
+from decimal import Decimal
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from httpx import AsyncClient
+from pydantic import TypeAdapter
+from redis.asyncio import Redis
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.cache.compression import compressor
+from src.config import (
+    TEST_DB_HOST,
+    TEST_DB_NAME,
+    TEST_DB_PASS,
+    TEST_DB_PORT,
+    TEST_DB_USER,
+    TEST_REDIS_HOST,
+    TEST_REDIS_PORT,
+)
+from src.database import Base, get_async_session, get_redis_client
+from src.main import app
+from src.models import Dish, Menu, Submenu
+from src.schemas import ResponseFullMenu, ResponseMenu
+
+MENUS = 10
+SUBMENUS_PER_MENU = 5
+DISHES_PER_SUBMENU = 10
+
+# endpoint: cache key of its response and adapter of its response model
+CACHED_RESPONSES: dict[str, tuple[str, TypeAdapter]] = {
+    'menus': ('all', TypeAdapter(list[ResponseMenu])),
+    'all_data': ('full', TypeAdapter(list[ResponseFullMenu])),
+}
+
+TEST_DATABASE_URL = (
+    f'postgresql+asyncpg://'
+    f'{TEST_DB_USER}:{TEST_DB_PASS}@{TEST_DB_HOST}:{TEST_DB_PORT}/{TEST_DB_NAME}'
+)
+bench_engine = create_async_engine(TEST_DATABASE_URL)
+bench_async_session = async_sessionmaker(bench_engine)
+bench_redis = Redis(host=TEST_REDIS_HOST, port=TEST_REDIS_PORT, db=0)
+
+
+async def override_get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    async with bench_async_session() as session:
+        yield session
+
+
+async def override_get_redis_client() -> AsyncGenerator[Redis, None]:
+    yield bench_redis
+
+
+async def fill_catalog() -> None:
+    """Recreate tables and insert a catalog of MENUS menus."""
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    menus, submenus, dishes = [], [], []
+    for m in range(MENUS):
+        menu_id = uuid.uuid4()
+        menus.append({'id': menu_id, 'title': f'menu {m}', 'description': 'menu description'})
+        for s in range(SUBMENUS_PER_MENU):
+            submenu_id = uuid.uuid4()
+            submenus.append({
+                'id': submenu_id, 'title': f'submenu {m} {s}',
+                'description': 'submenu description', 'menu_id': menu_id
+            })
+            for d in range(DISHES_PER_SUBMENU):
+                dishes.append({
+                    'id': uuid.uuid4(), 'title': f'dish {m} {s} {d}', 'description': 'dish description',
+                    'price': Decimal('182.99'), 'submenu_id': submenu_id, 'discount': None
+                })
+    async with bench_async_session() as session:
+        await session.execute(insert(Menu), menus)
+        await session.execute(insert(Submenu), submenus)
+        await session.execute(insert(Dish), dishes)
+        await session.commit()
+
+
+async def pickled_hit(key: str, adapter: TypeAdapter) -> Response:
+    """Cache hit before responses were stored as JSON: unpickle the response models,
+    validate them by the response model and encode them to JSON as FastAPI does."""
+    value = pickle.loads(compressor.decode(await bench_redis.get(key)))
+    return JSONResponse(jsonable_encoder(adapter.validate_python(value)))
+
+
+async def json_hit(key: str, adapter: TypeAdapter) -> Response:
+    """Cache hit with responses stored as JSON: return the stored body as it is."""
+    return Response(compressor.decode(await bench_redis.get(key)), media_type='application/json')
+
+
+async def compare_hits(requests: int) -> None:
+    """Time cache hits of the old pickled flow and of the current JSON flow
+    against the same cached data and print them side by side."""
+    print(f'\n{"endpoint":<10} {"pickled req/s":>14} {"json req/s":>11} {"speedup":>8}')
+    for path, (key, adapter) in CACHED_RESPONSES.items():
+        body = compressor.decode(await bench_redis.get(key))
+        pickled_key = f'bench_pickled_{key}'
+        await bench_redis.set(pickled_key, compressor.encode(pickle.dumps(adapter.validate_json(body))))
+        rates = []
+        for hit, hit_key in ((pickled_hit, pickled_key), (json_hit, key)):
+            await hit(hit_key, adapter)
+            start = time.perf_counter()
+            for _ in range(requests):
+                await hit(hit_key, adapter)
+            rates.append(requests / (time.perf_counter() - start))
+        print(f'/{path:<9} {rates[0]:>14.0f} {rates[1]:>11.0f} {rates[1] / rates[0]:>7.1f}x')
+
+
+async def main(requests: int, compare: bool) -> None:
+    app.dependency_overrides[get_async_session] = override_get_async_session
+    app.dependency_overrides[get_redis_client] = override_get_redis_client
+    await bench_redis.flushdb()
+    await fill_catalog()
+
+    print(f'{"endpoint":<10} {"requests":>9} {"seconds":>8} {"req/s":>8}')
+    async with AsyncClient(app=app, base_url='http://bench/api/v1/') as client:
+        for path in ('menus', 'all_data'):
+            await client.get(path)
+            start = time.perf_counter()
+            for _ in range(requests):
+                response = await client.get(path)
+                assert response.status_code == 200
+            elapsed = time.perf_counter() - start
+            print(f'/{path:<9} {requests:>9} {elapsed:>8.2f} {requests / elapsed:>8.0f}')
+
+    if compare:
+        await compare_hits(requests)
+
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await bench_redis.flushdb()
+    await bench_engine.dispose()
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if arg != '--compare']
+    asyncio.run(main(int(args[0]) if args else 2000, '--compare' in sys.argv[1:]))
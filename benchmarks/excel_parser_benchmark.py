@@ -0,0 +1,88 @@
+"""Rows per second and peak RSS of Excel parsing: pandas + iterrows vs columnar parser.
+
+Generates a workbook with ROWS rows in a temporary directory and parses it
+with each path in a separate process, so peak RSS of one path does not
+affect the other.
+
+Usage: python -m benchmarks.excel_parser_benchmark
+"""
+import multiprocessing
+import resource
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from openpyxl import Workbook
+
+ROWS = 100_000
+SUBMENUS_PER_MENU = 10
+DISHES_PER_SUBMENU = 50
+
+
+def generate_workbook(path: Path, rows: int) -> None:
+    """Write a workbook with menus, submenus and dishes."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    written = 0
+    while written < rows:
+        sheet.append([str(uuid.uuid4()), f'menu {written}', 'menu description'])
+        written += 1
+        for _ in range(SUBMENUS_PER_MENU):
+            sheet.append([None, str(uuid.uuid4()), f'submenu {written}', 'submenu description'])
+            written += 1
+            for _ in range(DISHES_PER_SUBMENU):
+                sheet.append([
+                    None, None, str(uuid.uuid4()), f'dish {written}', 'dish description', 182.99, 10
+                ])
+                written += 1
+    workbook.save(path)
+
+
+def parse_with_pandas(path: str) -> int:
+    """Former path: whole sheet into a DataFrame, then iterrows."""
+    import pandas as pd
+
+    count = 0
+    data = pd.read_excel(path, header=None)
+    for _, row in data.iterrows():
+        row.values
+        count += 1
+    return count
+
+
+def parse_with_columnar(path: str) -> int:
+    """Rows classified with NumPy masks, parent IDs forward-filled."""
+    from src.utils.excel_parser import read_excel_batches
+
+    menus, submenus, dishes = read_excel_batches(path)
+    return len(menus.id) + len(submenus.id) + len(dishes.id)
+
+
+def run(name: str, path: str, queue: multiprocessing.Queue) -> None:
+    parser = {'pandas + iterrows': parse_with_pandas, 'columnar': parse_with_columnar}[name]
+    start = time.perf_counter()
+    count = parser(path)
+    elapsed = time.perf_counter() - start
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    queue.put((count, elapsed, peak_rss_mb))
+
+
+def main() -> None:
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / 'Menu.xlsx')
+        generate_workbook(Path(path), ROWS)
+
+        print(f'{"parser":<18} {"rows":>7} {"seconds":>8} {"rows/s":>9} {"peak RSS MB":>12}')
+        for name in ('pandas + iterrows', 'columnar'):
+            queue = context.Queue()
+            process = context.Process(target=run, args=(name, path, queue))
+            process.start()
+            count, elapsed, peak_rss_mb = queue.get()
+            process.join()
+            print(f'{name:<18} {count:>7} {elapsed:>8.2f} {count / elapsed:>9.0f} {peak_rss_mb:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
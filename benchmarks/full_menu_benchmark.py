@@ -0,0 +1,114 @@
+"""Cold /api/v1/all_data latency as the catalog grows.
+
+Uses the test database and test redis from .env: tables are recreated
+and cache is flushed before every request, so each one is a cache miss.
+
+Usage: python -m benchmarks.full_menu_benchmark
+"""
+import asyncio
+import statistics
+import time
+import uuid
+from typing import AsyncGenerator
+
+from httpx import AsyncClient
+from redis.asyncio import Redis
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.config import (
+    TEST_DB_HOST,
+    TEST_DB_NAME,
+    TEST_DB_PASS,
+    TEST_DB_PORT,
+    TEST_DB_USER,
+    TEST_REDIS_HOST,
+    TEST_REDIS_PORT,
+)
+from src.database import Base, get_async_session, get_redis_client
+from src.main import app
+from src.models import Dish, Menu, Submenu
+
+CATALOG_SIZES = [
+    # menus, submenus per menu, dishes per submenu
+    (2, 10, 10),
+    (5, 20, 10),
+    (10, 30, 10),
+    (20, 30, 20),
+]
+REPEATS = 5
+
+TEST_DATABASE_URL = (
+    f'postgresql+asyncpg://'
+    f'{TEST_DB_USER}:{TEST_DB_PASS}@{TEST_DB_HOST}:{TEST_DB_PORT}/{TEST_DB_NAME}'
+)
+bench_engine = create_async_engine(TEST_DATABASE_URL)
+bench_async_session = async_sessionmaker(bench_engine)
+bench_redis = Redis(host=TEST_REDIS_HOST, port=TEST_REDIS_PORT, db=0)
+
+
+async def override_get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    async with bench_async_session() as session:
+        yield session
+
+
+async def override_get_redis_client() -> AsyncGenerator[Redis, None]:
+    yield bench_redis
+
+
+async def fill_catalog(menus: int, submenus: int, dishes: int) -> None:
+    """Recreate tables and fill them with generated catalog."""
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    menu_rows, submenu_rows, dish_rows = [], [], []
+    for m in range(menus):
+        menu_id = uuid.uuid4()
+        menu_rows.append({'id': menu_id, 'title': f'menu {m}', 'description': 'desc'})
+        for s in range(submenus):
+            submenu_id = uuid.uuid4()
+            submenu_rows.append({
+                'id': submenu_id, 'title': f'submenu {m}.{s}', 'description': 'desc', 'menu_id': menu_id
+            })
+            for d in range(dishes):
+                dish_rows.append({
+                    'id': uuid.uuid4(), 'title': f'dish {m}.{s}.{d}', 'description': 'desc',
+                    'price': '10.50', 'submenu_id': submenu_id
+                })
+
+    async with bench_async_session() as session:
+        await session.execute(insert(Menu), menu_rows)
+        await session.execute(insert(Submenu), submenu_rows)
+        await session.execute(insert(Dish), dish_rows)
+        await session.commit()
+
+
+async def main() -> None:
+    app.dependency_overrides[get_async_session] = override_get_async_session
+    app.dependency_overrides[get_redis_client] = override_get_redis_client
+
+    print(f'{"menus":>6} {"submenus":>9} {"dishes":>7} {"median ms":>10} {"max ms":>8}')
+    async with AsyncClient(app=app, base_url='http://bench/api/v1/') as client:
+        for menus, submenus, dishes in CATALOG_SIZES:
+            await fill_catalog(menus, submenus, dishes)
+            timings = []
+            for _ in range(REPEATS):
+                await bench_redis.flushdb()
+                start = time.perf_counter()
+                response = await client.get('/all_data')
+                timings.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200
+            print(
+                f'{menus:>6} {menus * submenus:>9} {menus * submenus * dishes:>7} '
+                f'{statistics.median(timings):>10.1f} {max(timings):>8.1f}'
+            )
+
+    await bench_redis.flushdb()
+    async with bench_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await bench_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
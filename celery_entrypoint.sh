@@ -2,4 +2,5 @@
 
 celery -A src.task.config beat -l debug &
 celery -A src.task.config worker -l info &
+python -m src.task.watcher &
 tail -f /dev/null
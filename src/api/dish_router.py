@@ -1,6 +1,6 @@
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Response, status
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,14 +12,16 @@ router = APIRouter()
 dish_service = DishService()
 
 
-@router.get('', status_code=status.HTTP_200_OK)
+@router.get(
+    '', status_code=status.HTTP_200_OK, response_model=list[ResponseDish]
+)
 async def get_all_dishes(
     target_menu_id: UUID,
     target_submenu_id: UUID,
     background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_async_session),
     redis_client: Redis = Depends(get_redis_client),
-) -> list[ResponseDish]:
+) -> list[ResponseDish] | Response:
     """Get from db list of all dishes and return it.
 
     target_menu_id: Menu ID that the submenu will belong to.
@@ -45,7 +47,7 @@ async def get_dish_by_id(
     background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_async_session),
     redis_client: Redis = Depends(get_redis_client),
-) -> ResponseDish:
+) -> ResponseDish | Response:
     """Get from db a specific dish by a specific ID and return it.
 
     target_menu_id: Menu ID that the submenu will belong to.
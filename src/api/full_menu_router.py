@@ -1,4 +1,4 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Response, status
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -10,12 +10,14 @@ router = APIRouter()
 full_menu_service = FullMenuService()
 
 
-@router.get('', status_code=status.HTTP_200_OK)
+@router.get(
+    '', status_code=status.HTTP_200_OK, response_model=list[ResponseFullMenu]
+)
 async def get_full_menu(
     background_task: BackgroundTasks,
     session: AsyncSession = Depends(get_async_session),
     redis_client: Redis = Depends(get_redis_client),
-) -> list[ResponseFullMenu] | list:
+) -> list[ResponseFullMenu] | list | Response:
     """Get from db list of menus with all submenus and dishes and return it.
 
     background_tasks: class instance FastAPI BackgroundTasks
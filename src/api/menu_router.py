@@ -1,6 +1,6 @@
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Response, status
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -19,7 +19,7 @@ async def get_all_menus(
     background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_async_session),
     redis_client: Redis = Depends(get_redis_client),
-) -> list[ResponseMenu]:
+) -> list[ResponseMenu] | Response:
     """Get from db list of all menus and return it.
 
     background_tasks: class instance FastAPI BackgroundTasks
@@ -39,7 +39,7 @@ async def get_menu_by_id(
     background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_async_session),
     redis_client: Redis = Depends(get_redis_client),
-) -> ResponseMenu:
+) -> ResponseMenu | Response:
     """Get from db a specific menu by a specific ID.
 
     target_menu_id: Menu ID you want to get.
@@ -0,0 +1,50 @@
+from typing import cast
+
+from fastapi import APIRouter, Depends, status
+from redis.asyncio import Redis
+
+from src.cache.metrics import cache_metrics
+from src.database import engine, get_redis_client, redis_pool
+from src.schemas import (
+    ResponseCacheStats,
+    ResponseDbPoolStats,
+    ResponseExcelSyncStats,
+    ResponseRedisPoolStats,
+)
+from src.task.tasks import get_sync_stats
+from src.utils.db_pool import TimedQueuePool
+
+router = APIRouter()
+
+
+@router.get(
+    '/redis_pool', status_code=status.HTTP_200_OK, response_model=ResponseRedisPoolStats
+)
+async def get_redis_pool_stats() -> dict[str, int]:
+    """Get usage of the redis connection pool of this process and return it."""
+    return redis_pool.stats()
+
+
+@router.get(
+    '/cache', status_code=status.HTTP_200_OK, response_model=dict[str, ResponseCacheStats]
+)
+async def get_cache_stats() -> dict[str, dict]:
+    """Get cache metrics of this process by key family and return them."""
+    return cache_metrics.snapshot()
+
+
+@router.get(
+    '/db_pool', status_code=status.HTTP_200_OK, response_model=ResponseDbPoolStats
+)
+async def get_db_pool_stats() -> dict:
+    """Get usage of the db connection pool of this process
+    and waits for its connections and return them."""
+    return cast(TimedQueuePool, engine.pool).stats()
+
+
+@router.get(
+    '/excel_sync', status_code=status.HTTP_200_OK, response_model=ResponseExcelSyncStats
+)
+async def get_excel_sync_stats(redis_client: Redis = Depends(get_redis_client)) -> dict[str, int]:
+    """Get counters of Excel file checks of all processes and return them."""
+    return await get_sync_stats(redis_client)
@@ -1,6 +1,6 @@
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Response, status
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -20,7 +20,7 @@ async def get_all_submenus(
     background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_async_session),
     redis_client: Redis = Depends(get_redis_client),
-) -> list[ResponseSubmenu]:
+) -> list[ResponseSubmenu] | Response:
     """Get from db list of all submenus and return it.
 
     target_menu_id: Menu ID that the submenu will belong to.
@@ -45,7 +45,7 @@ async def get_submenu_by_id(
     background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_async_session),
     redis_client: Redis = Depends(get_redis_client),
-) -> ResponseSubmenu:
+) -> ResponseSubmenu | Response:
     """Get from db a specific submenu by a specific ID.
 
     target_menu_id: Menu ID that the submenu will belong to.
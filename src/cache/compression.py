@@ -0,0 +1,81 @@
+import zlib
+from collections.abc import Callable
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+from src.config import CACHE_COMPRESS_MIN_SIZE, CACHE_COMPRESSION
+
+HEADERS = {'zlib': b'\x01', 'zstd': b'\x02', 'lz4': b'\x03'}
+PREFERRED = ('zstd', 'lz4', 'zlib')
+
+Codec = tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]
+
+CODECS: dict[str, Codec] = {'zlib': (lambda data: zlib.compress(data, 1), zlib.decompress)}
+if lz4_frame is not None:
+    CODECS['lz4'] = (lz4_frame.compress, lz4_frame.decompress)
+if zstandard is not None:
+    CODECS['zstd'] = (zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress)
+
+
+class Compressor:
+    """A class for compressing cached values above a size threshold.
+
+    A compressed value starts with a header byte of its codec (0x01 zlib,
+    0x02 zstd, 0x03 lz4), the codec is zstd or lz4 if installed, zlib otherwise.
+    Values below the threshold are stored as they are: pickled data starts with 0x80
+    and JSON with a printable character, so they are never taken for a header and
+    values written before compression was enabled stay readable.
+
+    Instance variable:
+        codec: Codec name, "none" disables compression.
+        min_size: Values shorter than this are not compressed.
+
+    Methods:
+        encode: Compress value if it is not shorter than the threshold.
+        decode: Decompress value if it starts with a codec header.
+    """
+
+    def __init__(self, codec: str = 'auto', min_size: int = 16384):
+        if codec == 'auto':
+            codec = next(name for name in PREFERRED if name in CODECS)
+        if codec != 'none' and codec not in CODECS:
+            raise ValueError(f'Compression codec {codec} is not available')
+        self.codec = codec
+        self.min_size = min_size
+        self._decompress = {HEADERS[name]: decompress for name, (_, decompress) in CODECS.items()}
+
+    def encode(self, data: bytes) -> bytes:
+        """Compress value if it is not shorter than the threshold,
+        a value that does not get shorter is stored as it is.
+
+        data: Serialized value.
+        """
+        if self.codec == 'none' or len(data) < self.min_size:
+            return data
+        compress, _ = CODECS[self.codec]
+        compressed = HEADERS[self.codec] + compress(data)
+        return compressed if len(compressed) < len(data) else data
+
+    def decode(self, data: bytes) -> bytes:
+        """Decompress value if it starts with a codec header.
+
+        data: Value from redis.
+        """
+        header = data[:1]
+        decompress = self._decompress.get(header)
+        if decompress is not None:
+            return decompress(data[1:])
+        if header in HEADERS.values():
+            raise ValueError(f'Compression codec of header {header!r} is not available')
+        return data
+
+
+compressor = Compressor(CACHE_COMPRESSION, CACHE_COMPRESS_MIN_SIZE)
@@ -0,0 +1,178 @@
+import bisect
+import importlib
+import logging
+from collections import defaultdict
+from collections.abc import Callable
+from uuid import UUID
+
+COUNTERS = ('hits', 'local_hits', 'stale_hits', 'misses', 'sets', 'invalidations')
+HISTOGRAM_BOUNDS = {
+    'payload_bytes': (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    'read_seconds': (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+    'build_seconds': (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+}
+NAMED_FAMILIES = ('all', 'full', 'db_data')
+
+MetricsHook = Callable[[str, str, float], None]
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """A class for counting observed values in buckets with fixed upper bounds.
+
+    Instance variable:
+        bounds: Upper bounds of buckets, values above the last one fall into the overflow bucket.
+        counts: Number of values in every bucket and the overflow bucket.
+        count: Number of values.
+        sum: Sum of values.
+
+    Methods:
+        observe: Count value in its bucket.
+        snapshot: Get bounds, counts, count and sum.
+    """
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Count value in its bucket.
+
+        value: Observed value.
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        """Get bounds, counts, count and sum."""
+        return {'bounds': list(self.bounds), 'counts': list(self.counts), 'count': self.count, 'sum': self.sum}
+
+
+class CacheMetrics:
+    """A class for collecting cache metrics of the process by key family.
+
+    Counters: hits in redis, hits in the local cache, stale hits served while
+    revalidated, misses, sets and invalidations. Histograms: payload size of read
+    and written data, latency of redis reads and of building missing data.
+    Every event is also passed to the hooks, so metrics can be exported elsewhere.
+
+    Methods:
+        count: Increment counter of key family.
+        observe: Add value to histogram of key family.
+        add_hook: Add function called with every event.
+        remove_hook: Remove function added with add_hook.
+        snapshot: Get counters and histograms of all key families.
+        reset: Delete all collected metrics.
+    """
+
+    def __init__(self):
+        self._counters: defaultdict[str, dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        self._histograms: defaultdict[str, dict[str, Histogram]] = defaultdict(_histograms)
+        self._hooks: list[MetricsHook] = []
+
+    def count(self, name: str, key: str, value: int = 1) -> None:
+        """Increment counter of key family.
+
+        name: Counter name.
+        key: Key-string the event happened with.
+        value: Increment.
+        """
+        family = key_family(key)
+        self._counters[family][name] += value
+        self._emit(name, family, value)
+
+    def observe(self, name: str, key: str, value: float) -> None:
+        """Add value to histogram of key family.
+
+        name: Histogram name.
+        key: Key-string the event happened with.
+        value: Observed value.
+        """
+        family = key_family(key)
+        self._histograms[family][name].observe(value)
+        self._emit(name, family, value)
+
+    def add_hook(self, hook: MetricsHook) -> None:
+        """Add function called with every event.
+
+        hook: Function getting metric name, key family and value.
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: MetricsHook) -> None:
+        """Remove function added with add_hook.
+
+        hook: Function getting metric name, key family and value.
+        """
+        self._hooks.remove(hook)
+
+    def snapshot(self) -> dict[str, dict]:
+        """Get counters and histograms of all key families."""
+        families = sorted(set(self._counters) | set(self._histograms))
+        return {
+            family: {
+                **self._counters[family],
+                **{name: histogram.snapshot() for name, histogram in self._histograms[family].items()},
+            }
+            for family in families
+        }
+
+    def reset(self) -> None:
+        """Delete all collected metrics."""
+        self._counters.clear()
+        self._histograms.clear()
+
+    def _emit(self, name: str, family: str, value: float) -> None:
+        """Protected method for passing event to the hooks, a failing hook
+        is logged and does not fail the cache operation.
+
+        name: Metric name.
+        family: Key family.
+        value: Increment or observed value.
+        """
+        for hook in self._hooks:
+            try:
+                hook(name, family, value)
+            except Exception:
+                logger.exception('Cache metrics hook %r failed', hook)
+
+
+def key_family(key: str) -> str:
+    """Function for getting family of a cache key: "all", "full", "db_data",
+    "menu", "submenus", "submenu", "dishes", "dish" by the shape of the key
+    built by the services, "other" for anything else.
+
+    key: Key-string by which the data is in the cache.
+    """
+    if key in NAMED_FAMILIES:
+        return key
+    parts = key.split('_')
+    try:
+        for part in parts if parts[-1] != 'all' else parts[:-1]:
+            UUID(part)
+    except ValueError:
+        return 'other'
+    if parts[-1] == 'all':
+        return {2: 'submenus', 3: 'dishes'}.get(len(parts), 'other')
+    return {1: 'menu', 2: 'submenu', 3: 'dish'}.get(len(parts), 'other')
+
+
+def load_hook(path: str) -> MetricsHook:
+    """Function for importing hook function by path "package.module:function".
+
+    path: Import path of the hook function.
+    """
+    module, _, name = path.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def _histograms() -> dict[str, Histogram]:
+    """Protected function for getting histograms of a key family without values."""
+    return {name: Histogram(bounds) for name, bounds in HISTOGRAM_BOUNDS.items()}
+
+
+cache_metrics = CacheMetrics()
@@ -1,39 +1,421 @@
+import asyncio
+import logging
 import pickle
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
 from typing import Any
+from uuid import UUID, uuid4
+from weakref import WeakKeyDictionary
 
+from fastapi import BackgroundTasks
+from pydantic import TypeAdapter
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import WatchError
+
+from src.cache.compression import compressor
+from src.cache.metrics import cache_metrics
+from src.config import (
+    CACHE_L1_CHECK_INTERVAL,
+    CACHE_L1_SIZE,
+    CACHE_L1_TTL,
+    CACHE_LOCK_TIMEOUT,
+    CACHE_LOCK_WAIT,
+    CACHE_STRICT_INVALIDATION,
+)
+
+VERSION_KEY = 'cache_version'
+TAG_PREFIX = 'tag:'
+LOCK_PREFIX = 'lock:'
+LOCK_POLL_INTERVAL = 0.02
+FRESH_SUFFIX = ':fresh'
+ALWAYS_DELETED = ('full', 'db_data')
+STALE_WHILE_REVALIDATE = ('full',)
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCache:
+    """A class for storing cache in process memory in front of redis,
+    disabled unless a size is configured.
+
+    Size is bounded with LRU eviction and every entry lives for TTL seconds.
+    Coherence with redis: every invalidation increments the version key in redis
+    and clears the local cache of its own process, other processes compare the
+    version at most once per check interval and clear their local cache if it changed.
+    So data deleted from redis can be served by other processes for at most
+    the check interval.
+
+    Instance variable:
+        size: Maximum number of entries, 0 disables the local cache.
+        ttl: Entry retention time in seconds.
+        check_interval: Seconds between version checks in redis.
+
+    Methods:
+        sync: Clear local cache if the version in redis has changed.
+        get: Get data by key from local cache.
+        add: Add data to local cache.
+        delete: Delete data by key from local cache.
+        clear: Delete all data from local cache.
+    """
+
+    def __init__(self, size: int, ttl: float, check_interval: float):
+        self.size = size
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._version: bytes | None = None
+        self._checked_at = float('-inf')
+
+    async def sync(self, client: Redis) -> None:
+        """Clear local cache if the version in redis has changed
+        since the last check, checks not more often than the check interval.
+
+        client: Redis session.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        version = await client.get(VERSION_KEY)
+        if version != self._version:
+            self._data.clear()
+            self._version = version
+        self._checked_at = now
+
+    def get(self, key: str) -> Any | None:
+        """Get data by key from local cache.
+
+        key: Key-string by which the data is in the cache.
+        """
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def add(self, key: str, value: Any) -> None:
+        """Add data to local cache.
+
+        key: Key-string by which the data will be located in the cache.
+        value: Data you want to cache.
+        """
+        if self.size <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.size:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Delete data by key from local cache.
+
+        key: Key-string by which the data is in the cache.
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Delete all data from local cache."""
+        self._data.clear()
+
+
+local_cache = LocalCache(CACHE_L1_SIZE, CACHE_L1_TTL, CACHE_L1_CHECK_INTERVAL)
+
+
+class CacheBatch:
+    """A class for collecting cache changes and writing them to redis at once.
+
+    Deleted keys, deleted subtrees and added data are written in one MULTI
+    pipeline, deleted subtrees need one more round trip to read their tag sets.
+    Every batch with deletes also deletes "full" and "db_data", clears
+    the local cache and increments the version key in redis. Added keys
+    are deleted from the local cache of the process. Rebuild locks of
+    deleted keys are deleted too, and the incremented version key fences
+    rebuilds of keys not in a tag set yet, so a rebuild that started before
+    the delete does not write outdated data. Keys served stale while
+    revalidated ("full") are only marked stale, unless the invalidation is strict.
+
+    Instance variable:
+        client: Redis session.
+        expired_time: Cache retention time.
+        strict: Delete keys served stale while revalidated instead of marking them stale.
+
+    Methods:
+        delete: Delete data by keys from cache.
+        delete_tree: Delete data of a menu, submenu or dish and everything under it from cache.
+        add: Add data to cache.
+        add_json: Add data to cache as JSON response body.
+        flush: Write collected changes to redis.
+    """
+
+    def __init__(self, client: Redis, expired_time: int):
+        self.client = client
+        self.expired_time = expired_time
+        self.strict = CACHE_STRICT_INVALIDATION
+        self._keys: set[str] = set()
+        self._tags: set[str] = set()
+        self._items: dict[str, bytes] = dict()
+        self._fresh: dict[str, float] = dict()
+
+    def delete(self, *keys: str) -> None:
+        """Delete data by keys from cache.
+
+        keys: Keys-strings by which the data is in the cache.
+        """
+        self._keys.update(keys)
+
+    def delete_tree(self, item_id: str) -> None:
+        """Delete data of a menu, submenu or dish and everything under it from cache.
+
+        item_id: ID of the menu, submenu or dish.
+        """
+        self._tags.add(f'{TAG_PREFIX}{item_id}')
+
+    def add(self, key: str, value: Any) -> None:
+        """Add data to cache.
+
+        key: Key-string by which the data will be located in the cache.
+        value: Data you want to cache.
+        """
+        self._items[key] = compressor.encode(pickle.dumps(value))
+
+    def add_json(self, key: str, value: Any, adapter: TypeAdapter, fresh_time: float | None = None) -> None:
+        """Add data to cache as JSON response body.
+
+        key: Key-string by which the data will be located in the cache.
+        value: Data you want to cache, bytes are taken as JSON already serialized by db.
+        adapter: Pydantic type adapter of the response model.
+        fresh_time: Seconds the data is fresh, for data served stale while revalidated.
+        """
+        self._items[key] = compressor.encode(_dump_json(value, adapter))
+        if fresh_time is not None:
+            self._fresh[key] = fresh_time
+
+    async def flush(self, version: int | None = None) -> bool:
+        """Write collected changes to redis and return whether they were written.
+        Keys are deleted before data is added, so a key can be deleted and added in one batch.
+
+        version: Write changes only if the version key in redis still has this value
+        (0 if it is missing), so data built before an invalidation is not written after it.
+        """
+        keys, tags, items, fresh = self._keys, self._tags, self._items, self._fresh
+        self._keys, self._tags, self._items, self._fresh = set(), set(), dict(), dict()
+        invalidate = bool(keys or tags)
+        if not invalidate and not items:
+            return False
+
+        if tags:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.smembers(tag)
+                for members in await pipe.execute():
+                    keys.update(member.decode() for member in members)
+
+        if invalidate:
+            keys.update(ALWAYS_DELETED)
+        async with self.client.pipeline(transaction=True) as pipe:
+            if version is not None:
+                try:
+                    await pipe.watch(VERSION_KEY)
+                    if int(await pipe.get(VERSION_KEY) or 0) != version:
+                        return False
+                    pipe.multi()
+                    self._write(pipe, keys, tags, items, fresh, invalidate)
+                    await pipe.execute()
+                except WatchError:
+                    return False
+            else:
+                self._write(pipe, keys, tags, items, fresh, invalidate)
+                await pipe.execute()
+        if invalidate:
+            local_cache.clear()
+            for key in keys:
+                cache_metrics.count('invalidations', key)
+        for key, data in items.items():
+            local_cache.delete(key)
+            cache_metrics.count('sets', key)
+            cache_metrics.observe('payload_bytes', key, len(data))
+        return True
+
+    def _write(
+        self, pipe: Pipeline, keys: set[str], tags: set[str], items: dict[str, bytes],
+        fresh: dict[str, float], invalidate: bool
+    ) -> None:
+        """Protected method for queueing collected changes in the MULTI pipeline.
+        Data served stale while revalidated is not deleted, its fresh marker is,
+        unless the invalidation is strict.
+
+        pipe: Redis pipeline.
+        keys: Deleted keys.
+        tags: Deleted tag sets.
+        items: Added data by keys.
+        fresh: Seconds the added data is fresh by keys.
+        invalidate: Whether keys or tags are deleted.
+        """
+        if invalidate:
+            locks = [f'{LOCK_PREFIX}{key}' for key in keys]
+            deleted = keys
+            if not self.strict:
+                stale = keys.intersection(STALE_WHILE_REVALIDATE)
+                deleted = keys.difference(stale).union(f'{key}{FRESH_SUFFIX}' for key in stale)
+            pipe.unlink(*deleted, *tags, *locks)
+            pipe.incr(VERSION_KEY)
+        for key, data in items.items():
+            pipe.set(key, data, ex=self.expired_time)
+            if key in fresh:
+                pipe.set(f'{key}{FRESH_SUFFIX}', 1, px=int(fresh[key] * 1000))
+            for tag in _tags(key):
+                pipe.sadd(tag, key)
+                pipe.expire(tag, self.expired_time)
+
+
+_request_batches: WeakKeyDictionary[BackgroundTasks, CacheBatch] = WeakKeyDictionary()
 
 
 class Cache:
     """A class for storing and handling the cache.
 
+    Data is read from the process local cache first (if enabled) and from redis
+    on a miss. Responses of API handlers are stored as ready JSON bodies,
+    other data is pickled, values above the size threshold are compressed.
+    Every key is added to a tag set of each menu, submenu and dish ID it consists of,
+    so data of a subtree is deleted by its tag set without scanning the keyspace.
+    Every delete clears the local cache and increments the version key in redis,
+    so local caches of other processes are cleared too.
+
+    A missing response is rebuilt by one caller across all processes (single flight):
+    the caller holding the rebuild lock builds it, other callers wait for the result
+    and build it themselves only if it does not appear in the lock wait time.
+    The lock expires after the lock timeout, so a crashed builder does not block
+    others, and the result is written only while the builder still holds the lock
+    and no invalidation happened since the build started (the version key in redis
+    did not change), so data built before a write is not cached after it.
+
     Instance variable:
         expired_time: Cache retention time.
+        use_local: Read and fill the process local cache.
+        lock_timeout: Seconds after which the rebuild lock expires.
+        lock_wait: Seconds to wait for the result of another caller.
 
     Methods:
         get: Get data by key from cache.
+        get_json: Get JSON response body by key from cache.
+        get_json_or_build: Get JSON response body by key from cache or build it once
+        across all processes.
+        get_json_or_revalidate: Get JSON response body by key from cache serving it
+        stale while revalidated.
+        batch: Get batch of cache changes written to redis at once.
         add: Add data to cache.
+        add_json: Add data to cache as JSON response body.
         delete: Delete data by key from cache.
-        cascade_delete: Delete data by key pattern from cache.
-        excel_cascade_delete: Delete data by key pattern from cache
-        special for clear cache for Excel file.
-        multiply_delete: Delete data by list of keys from cache.
     """
 
-    def __init__(self):
+    def __init__(self, use_local: bool = True):
         self.expired_time = 60 * 30
+        self.use_local = use_local and local_cache.size > 0
+        self.lock_timeout = CACHE_LOCK_TIMEOUT
+        self.lock_wait = CACHE_LOCK_WAIT
 
-    @staticmethod
-    async def get(client: Redis, key: str) -> Any | None:
+    async def get(self, client: Redis, key: str) -> Any | None:
         """Get data by key from cache.
 
         client: Redis session.
         key: Key-string by which the data is in the cache.
         """
-        data = await client.get(key)
-        if data:
-            return pickle.loads(data)
-        return None
+        return await self._get(client, key, pickle.loads)
+
+    async def get_json(self, client: Redis, key: str) -> bytes | None:
+        """Get JSON response body by key from cache.
+
+        client: Redis session.
+        key: Key-string by which the data is in the cache.
+        """
+        return await self._get(client, key, bytes)
+
+    async def get_json_or_build(
+        self, client: Redis, key: str, build: Callable[[], Awaitable[Any]], adapter: TypeAdapter,
+        fresh_time: float | None = None
+    ) -> bytes:
+        """Get JSON response body by key from cache or build it once across all processes,
+        add it to cache and return it.
+
+        client: Redis session.
+        key: Key-string by which the data is in the cache.
+        build: Coroutine function getting data from db.
+        adapter: Pydantic type adapter of the response model.
+        fresh_time: Seconds the built data is fresh, for data served stale while revalidated.
+        """
+        data = await self.get_json(client, key)
+        if data is not None:
+            return data
+        return await self._build(client, key, build, adapter, fresh_time)
+
+    async def get_json_or_revalidate(
+        self, client: Redis, key: str, build: Callable[[], Awaitable[Any]], adapter: TypeAdapter,
+        fresh_time: float, background_tasks: BackgroundTasks
+    ) -> bytes:
+        """Get JSON response body by key from cache serving it stale while revalidated
+        and return it. Data is fresh for the fresh time after it was built and until
+        a write marks it stale. Stale data is returned at once and one caller across
+        all processes rebuilds it after the response. Only missing data (expired after
+        the retention time or deleted by a strict invalidation) is built before the response.
+
+        client: Redis session.
+        key: Key-string by which the data is in the cache.
+        build: Coroutine function getting data from db.
+        adapter: Pydantic type adapter of the response model.
+        fresh_time: Seconds the built data is fresh.
+        background_tasks: class instance FastAPI BackgroundTasks
+        "tasks to be run after returning a response".
+        """
+        if self.use_local:
+            await local_cache.sync(client)
+            data = local_cache.get(key)
+            if data is not None:
+                cache_metrics.count('local_hits', key)
+                return data
+
+        start = time.perf_counter()
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.exists(f'{key}{FRESH_SUFFIX}')
+            data, fresh = await pipe.execute()
+        cache_metrics.observe('read_seconds', key, time.perf_counter() - start)
+
+        if not data:
+            cache_metrics.count('misses', key)
+            return await self._build(client, key, build, adapter, fresh_time)
+        cache_metrics.observe('payload_bytes', key, len(data))
+        data = compressor.decode(data)
+        if fresh:
+            cache_metrics.count('hits', key)
+            if self.use_local:
+                local_cache.add(key, data)
+        else:
+            cache_metrics.count('stale_hits', key)
+            background_tasks.add_task(self._revalidate, client, key, build, adapter, fresh_time)
+        return data
+
+    def batch(self, client: Redis, background_tasks: BackgroundTasks | None = None) -> CacheBatch:
+        """Get batch of cache changes written to redis at once.
+        With background tasks the batch is shared by the whole request and
+        flushed once after the response, otherwise it must be flushed by the caller.
+
+        client: Redis session.
+        background_tasks: class instance FastAPI BackgroundTasks
+        "tasks to be run after returning a response".
+        """
+        if background_tasks is None:
+            return CacheBatch(client, self.expired_time)
+        batch = _request_batches.get(background_tasks)
+        if batch is None:
+            batch = _request_batches[background_tasks] = CacheBatch(client, self.expired_time)
+            background_tasks.add_task(batch.flush)
+        return batch
 
     async def add(self, client: Redis, key: str, value: Any) -> None:
         """Add data to cache.
@@ -42,8 +424,21 @@ class Cache:
         key: Key-string by which the data will be located in the cache.
         value: Data you want to cache.
         """
-        data = pickle.dumps(value)
-        await client.set(key, data, ex=self.expired_time)
+        batch = self.batch(client)
+        batch.add(key, value)
+        await batch.flush()
+
+    async def add_json(self, client: Redis, key: str, value: Any, adapter: TypeAdapter) -> None:
+        """Add data to cache as JSON response body.
+
+        client: Redis session.
+        key: Key-string by which the data will be located in the cache.
+        value: Data you want to cache.
+        adapter: Pydantic type adapter of the response model.
+        """
+        batch = self.batch(client)
+        batch.add_json(key, value, adapter)
+        await batch.flush()
 
     async def delete(self, client: Redis, key: str) -> None:
         """Delete data by key from cache.
@@ -51,38 +446,195 @@ class Cache:
         client: Redis session.
         key: Key-string by which the data is in the cache.
         """
-        await self.multiply_delete(client, ['full', 'db_data'])
-        await client.delete(key)
+        batch = self.batch(client)
+        batch.delete(key)
+        await batch.flush()
 
-    async def cascade_delete(self, client: Redis, pattern: str) -> None:
-        """Delete data by key pattern from cache.
+    async def _build(
+        self, client: Redis, key: str, build: Callable[[], Awaitable[Any]], adapter: TypeAdapter,
+        fresh_time: float | None
+    ) -> bytes:
+        """Protected method for building missing data once across all processes,
+        adding it to cache and returning it.
 
         client: Redis session.
-        pattern: Part of the key by coincidence with which all keys will be deleted.
+        key: Key-string by which the data will be located in the cache.
+        build: Coroutine function getting data from db.
+        adapter: Pydantic type adapter of the response model.
+        fresh_time: Seconds the built data is fresh, for data served stale while revalidated.
         """
-        await self.multiply_delete(client, ['all', 'full', 'db_data'])
-        async for key in client.scan_iter(f'{pattern}*'):
-            await client.delete(key)
+        lock = f'{LOCK_PREFIX}{key}'
+        token: str | None = uuid4().hex
+        deadline = time.monotonic() + self.lock_wait
+        while not await client.set(lock, token, nx=True, px=int(self.lock_timeout * 1000)):
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            data = await client.get(key)
+            if data:
+                return compressor.decode(data)
+            if time.monotonic() >= deadline:
+                token = None
+                break
 
-    async def excel_cascade_delete(self, client: Redis, pattern: str) -> None:
-        """Delete data by key pattern from cache special for clear cache for Excel file.
+        version = int(await client.get(VERSION_KEY) or 0)
+        try:
+            data = await self._build_json(key, build, adapter)
+        except BaseException:
+            if token is not None:
+                await self._release_lock(client, lock, token)
+            raise
+        if token is not None:
+            await self._set_locked(client, key, data, lock, token, version, fresh_time)
+        return data
+
+    async def _revalidate(
+        self, client: Redis, key: str, build: Callable[[], Awaitable[Any]], adapter: TypeAdapter,
+        fresh_time: float
+    ) -> None:
+        """Protected method for rebuilding stale data if no other caller rebuilds it.
 
         client: Redis session.
-        pattern: Part of the key by coincidence with which all keys will be deleted.
+        key: Key-string by which the data is in the cache.
+        build: Coroutine function getting data from db.
+        adapter: Pydantic type adapter of the response model.
+        fresh_time: Seconds the built data is fresh.
+        """
+        lock = f'{LOCK_PREFIX}{key}'
+        token = uuid4().hex
+        if not await client.set(lock, token, nx=True, px=int(self.lock_timeout * 1000)):
+            return
+        version = int(await client.get(VERSION_KEY) or 0)
+        try:
+            data = await self._build_json(key, build, adapter)
+        except Exception:
+            logger.exception('Revalidation of %s failed', key)
+            await self._release_lock(client, lock, token)
+            return
+        await self._set_locked(client, key, data, lock, token, version, fresh_time)
+
+    @staticmethod
+    async def _build_json(key: str, build: Callable[[], Awaitable[Any]], adapter: TypeAdapter) -> bytes:
+        """Protected method for getting data from db as JSON response body.
+
+        key: Key-string by which the data will be located in the cache.
+        build: Coroutine function getting data from db, or JSON already serialized by db as bytes.
+        adapter: Pydantic type adapter of the response model.
+        """
+        start = time.perf_counter()
+        data = _dump_json(await build(), adapter)
+        cache_metrics.observe('build_seconds', key, time.perf_counter() - start)
+        return data
+
+    async def _set_locked(
+        self, client: Redis, key: str, data: bytes, lock: str, token: str, version: int,
+        fresh_time: float | None = None
+    ) -> None:
+        """Protected method for setting data by key in redis and releasing the lock
+        only if the lock is still held with the token (it did not expire and was not
+        deleted by an invalidation) and the version key did not change since the build
+        started (no invalidation happened during the build), otherwise the data is not written.
+
+        client: Redis session.
+        key: Key-string by which the data will be located in the cache.
+        data: Serialized data.
+        lock: Lock key.
+        token: Token the lock was acquired with.
+        version: Value of the version key in redis before the build (0 if it was missing).
+        fresh_time: Seconds the data is fresh, for data served stale while revalidated.
         """
-        await self.multiply_delete(client, ['full'])
-        async for key in client.scan_iter(f'*{pattern}*'):
-            await client.delete(key)
+        data = compressor.encode(data)
+        async with client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(lock, VERSION_KEY)
+                if await pipe.get(lock) != token.encode():
+                    return
+                if int(await pipe.get(VERSION_KEY) or 0) != version:
+                    pipe.multi()
+                    pipe.unlink(lock)
+                    await pipe.execute()
+                    return
+                pipe.multi()
+                pipe.set(key, data, ex=self.expired_time)
+                if fresh_time is not None:
+                    pipe.set(f'{key}{FRESH_SUFFIX}', 1, px=int(fresh_time * 1000))
+                for tag in _tags(key):
+                    pipe.sadd(tag, key)
+                    pipe.expire(tag, self.expired_time)
+                pipe.unlink(lock)
+                await pipe.execute()
+            except WatchError:
+                return
+        cache_metrics.count('sets', key)
+        cache_metrics.observe('payload_bytes', key, len(data))
 
     @staticmethod
-    async def multiply_delete(client: Redis, keys: list[str]) -> None:
-        """Delete data by list of keys from cache.
+    async def _release_lock(client: Redis, lock: str, token: str) -> None:
+        """Protected method for deleting the lock if it is still held with the token.
 
         client: Redis session.
-        keys: List of keys-strings by which the data is in the cache.
+        lock: Lock key.
+        token: Token the lock was acquired with.
         """
-        await client.delete('full')
-        await client.delete('db_data')
-        for key in keys:
-            if await client.exists(key):
-                await client.delete(key)
+        async with client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(lock)
+                if await pipe.get(lock) != token.encode():
+                    return
+                pipe.multi()
+                pipe.unlink(lock)
+                await pipe.execute()
+            except WatchError:
+                return
+
+    async def _get(self, client: Redis, key: str, loads: Callable[[bytes], Any]) -> Any | None:
+        """Protected method for getting data by key from local cache or redis.
+
+        client: Redis session.
+        key: Key-string by which the data is in the cache.
+        loads: Function for converting bytes from redis to data.
+        """
+        if self.use_local:
+            await local_cache.sync(client)
+            value = local_cache.get(key)
+            if value is not None:
+                cache_metrics.count('local_hits', key)
+                return value
+        start = time.perf_counter()
+        data = await client.get(key)
+        cache_metrics.observe('read_seconds', key, time.perf_counter() - start)
+        if data:
+            cache_metrics.count('hits', key)
+            cache_metrics.observe('payload_bytes', key, len(data))
+            value = loads(compressor.decode(data))
+            if self.use_local and value is not None:
+                local_cache.add(key, value)
+            return value
+        cache_metrics.count('misses', key)
+        return None
+
+
+def _dump_json(value: Any, adapter: TypeAdapter) -> bytes:
+    """Protected function for serializing data to JSON response body with the adapter,
+    bytes are JSON already serialized by db and are returned as they are.
+
+    value: Data from db.
+    adapter: Pydantic type adapter of the response model.
+    """
+    if isinstance(value, bytes):
+        return value
+    return adapter.dump_json(adapter.validate_python(value))
+
+
+def _tags(key: str) -> list[str]:
+    """Protected function for getting tag sets of a key,
+    one for every menu, submenu or dish ID the key consists of.
+
+    key: Key-string by which the data is in the cache.
+    """
+    tags = []
+    for part in key.split('_'):
+        try:
+            UUID(part)
+        except ValueError:
+            continue
+        tags.append(f'{TAG_PREFIX}{part}')
+    return tags
@@ -0,0 +1,109 @@
+import asyncio
+
+from redis.asyncio import BlockingConnectionPool
+from redis.asyncio.connection import Connection
+from redis.exceptions import ConnectionError
+
+from src.config import (
+    REDIS_HEALTH_CHECK_INTERVAL,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_POOL_TIMEOUT,
+    REDIS_SOCKET_KEEPALIVE,
+)
+
+
+class RedisPool(BlockingConnectionPool):
+    """A class of redis connection pool shared by all clients of a process.
+
+    Connections are created on demand up to max connections and reused,
+    when all of them are in use callers wait for a free one up to the timeout
+    instead of opening new connections. Waits are counted to size the pool.
+    Created and checked out connections are tracked by the pool itself and
+    the wait timeout is applied by the pool, so usage does not depend on
+    internals of redis-py.
+
+    Instance variable:
+        wait_timeout: Seconds to wait for a free connection, None waits without limit.
+        waits: Number of times a caller waited for a free connection.
+        wait_timeouts: Number of waits that ran out of the timeout.
+
+    Methods:
+        get_connection: Get a connection, waiting for a free one if all are in use.
+        release: Return a connection to the pool.
+        make_connection: Create a new connection.
+        reset: Forget all connections of the pool.
+        stats: Get pool usage.
+    """
+
+    def __init__(self, timeout: float | None = 20, **kwargs):
+        self.wait_timeout = timeout
+        super().__init__(timeout=None, **kwargs)
+        self.waits = 0
+        self.wait_timeouts = 0
+
+    async def get_connection(self, command_name, *keys, **options):
+        """Get a connection, waiting for a free one if all are in use.
+
+        command_name: Name of the command the connection is taken for.
+        """
+        self._checkpid()
+        waited = len(self._checked_out) >= self.max_connections
+        if waited:
+            self.waits += 1
+        try:
+            connection = await asyncio.wait_for(
+                super().get_connection(command_name, *keys, **options), self.wait_timeout
+            )
+        except asyncio.TimeoutError:
+            self.wait_timeouts += 1
+            raise ConnectionError(f'No connection available in {self.wait_timeout} seconds') from None
+        self._checked_out.add(connection)
+        return connection
+
+    async def release(self, connection: Connection) -> None:
+        """Return a connection to the pool.
+
+        connection: Connection taken with get_connection.
+        """
+        self._checked_out.discard(connection)
+        await super().release(connection)
+
+    def make_connection(self) -> Connection:
+        """Create a new connection."""
+        self._created += 1
+        return super().make_connection()
+
+    def reset(self) -> None:
+        """Forget all connections of the pool, called on creation and in a forked process."""
+        super().reset()
+        self._created = 0
+        self._checked_out: set[Connection] = set()
+
+    def stats(self) -> dict[str, int]:
+        """Get pool usage: connections created, in use and idle, waits for a free connection."""
+        in_use = len(self._checked_out)
+        return {
+            'max_connections': self.max_connections,
+            'created': self._created,
+            'in_use': in_use,
+            'idle': self._created - in_use,
+            'waits': self.waits,
+            'wait_timeouts': self.wait_timeouts,
+        }
+
+
+def create_redis_pool(host: str | None, port: str | int | None) -> RedisPool:
+    """Function for creating redis connection pool configured from environment.
+
+    host: Redis host.
+    port: Redis port.
+    """
+    return RedisPool(
+        host=host,
+        port=port,
+        db=0,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_keepalive=REDIS_SOCKET_KEEPALIVE,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+    )
@@ -10,6 +10,15 @@ DB_PASS = os.environ.get('DB_PASS')
 DB_USER = os.environ.get('DB_USER')
 DB_NAME = os.environ.get('DB_NAME')
 
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true')
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 100))
+DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 30000))
+DB_WORKER_STATEMENT_TIMEOUT = int(os.environ.get('DB_WORKER_STATEMENT_TIMEOUT', 0))
+
 TEST_DB_HOST = os.environ.get('TEST_DB_HOST')
 TEST_DB_PORT = os.environ.get('TEST_DB_PORT')
 TEST_DB_PASS = os.environ.get('TEST_DB_PASS')
@@ -19,6 +28,11 @@ TEST_DB_NAME = os.environ.get('TEST_DB_NAME')
 REDIS_HOST = os.environ.get('REDIS_HOST')
 REDIS_PORT = os.environ.get('REDIS_PORT')
 
+REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', 50))
+REDIS_POOL_TIMEOUT = float(os.environ.get('REDIS_POOL_TIMEOUT', 5))
+REDIS_SOCKET_KEEPALIVE = os.environ.get('REDIS_SOCKET_KEEPALIVE', 'true').lower() in ('1', 'true')
+REDIS_HEALTH_CHECK_INTERVAL = int(os.environ.get('REDIS_HEALTH_CHECK_INTERVAL', 30))
+
 TEST_REDIS_HOST = os.environ.get('TEST_REDIS_HOST')
 TEST_REDIS_PORT = os.environ.get('TEST_REDIS_PORT')
 
@@ -31,3 +45,21 @@ BACKEND_USER = os.environ.get('BACKEND_USER')
 BACKEND_PASS = os.environ.get('BACKEND_PASS')
 BACKEND_HOST = os.environ.get('BACKEND_HOST')
 BACKEND_PORT = os.environ.get('BACKEND_PORT')
+
+EXCEL_SYNC_MODE = os.environ.get('EXCEL_SYNC_MODE', 'polling')
+EXCEL_POLL_INTERVAL = float(os.environ.get('EXCEL_POLL_INTERVAL', 15))
+EXCEL_POLL_FALLBACK_INTERVAL = float(os.environ.get('EXCEL_POLL_FALLBACK_INTERVAL', 300))
+EXCEL_WATCHER_DEBOUNCE = float(os.environ.get('EXCEL_WATCHER_DEBOUNCE', 1))
+
+CACHE_L1_SIZE = int(os.environ.get('CACHE_L1_SIZE', 0))
+CACHE_L1_TTL = float(os.environ.get('CACHE_L1_TTL', 30))
+CACHE_L1_CHECK_INTERVAL = float(os.environ.get('CACHE_L1_CHECK_INTERVAL', 1))
+CACHE_LOCK_TIMEOUT = float(os.environ.get('CACHE_LOCK_TIMEOUT', 10))
+CACHE_LOCK_WAIT = float(os.environ.get('CACHE_LOCK_WAIT', 3))
+CACHE_FULL_SOFT_TTL = float(os.environ.get('CACHE_FULL_SOFT_TTL', 60))
+CACHE_STRICT_INVALIDATION = os.environ.get('CACHE_STRICT_INVALIDATION', 'false').lower() in ('1', 'true')
+CACHE_COMPRESSION = os.environ.get('CACHE_COMPRESSION', 'auto')
+CACHE_COMPRESS_MIN_SIZE = int(os.environ.get('CACHE_COMPRESS_MIN_SIZE', 16384))
+CACHE_WARMUP = os.environ.get('CACHE_WARMUP', 'true').lower() in ('1', 'true')
+CACHE_WARMUP_CONCURRENCY = int(os.environ.get('CACHE_WARMUP_CONCURRENCY', 4))
+CACHE_METRICS_HOOK = os.environ.get('CACHE_METRICS_HOOK')
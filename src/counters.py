@@ -0,0 +1,142 @@
+from typing import NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+COUNTER_FUNCTIONS = (
+    """CREATE OR REPLACE FUNCTION count_dishes() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        submenu_ids UUID[];
+        deltas BIGINT[];
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT array_agg(submenu_id), array_agg(n) INTO submenu_ids, deltas
+            FROM (SELECT submenu_id, count(*) AS n FROM new_rows GROUP BY submenu_id) AS delta;
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT array_agg(submenu_id), array_agg(n) INTO submenu_ids, deltas
+            FROM (SELECT submenu_id, -count(*) AS n FROM old_rows GROUP BY submenu_id) AS delta;
+        ELSE
+            SELECT array_agg(submenu_id), array_agg(n) INTO submenu_ids, deltas
+            FROM (
+                SELECT submenu_id, sum(n) AS n FROM (
+                    SELECT submenu_id, 1 AS n FROM new_rows
+                    UNION ALL SELECT submenu_id, -1 FROM old_rows
+                ) AS moved GROUP BY submenu_id HAVING sum(n) <> 0
+            ) AS delta;
+        END IF;
+
+        UPDATE submenus SET dishes_count = submenus.dishes_count + delta.n
+        FROM unnest(submenu_ids, deltas) AS delta (submenu_id, n)
+        WHERE submenus.id = delta.submenu_id;
+        RETURN NULL;
+    END $$""",
+    """CREATE OR REPLACE FUNCTION count_submenus() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        menu_ids UUID[];
+        submenu_deltas BIGINT[];
+        dish_deltas BIGINT[];
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT array_agg(menu_id), array_agg(submenus), array_agg(dishes)
+            INTO menu_ids, submenu_deltas, dish_deltas
+            FROM (
+                SELECT menu_id, count(*) AS submenus, sum(dishes_count) AS dishes
+                FROM new_rows GROUP BY menu_id
+            ) AS delta;
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT array_agg(menu_id), array_agg(submenus), array_agg(dishes)
+            INTO menu_ids, submenu_deltas, dish_deltas
+            FROM (
+                SELECT menu_id, -count(*) AS submenus, -sum(dishes_count) AS dishes
+                FROM old_rows GROUP BY menu_id
+            ) AS delta;
+        ELSE
+            SELECT array_agg(menu_id), array_agg(submenus), array_agg(dishes)
+            INTO menu_ids, submenu_deltas, dish_deltas
+            FROM (
+                SELECT menu_id, sum(submenus) AS submenus, sum(dishes) AS dishes FROM (
+                    SELECT menu_id, 1 AS submenus, dishes_count AS dishes FROM new_rows
+                    UNION ALL SELECT menu_id, -1, -dishes_count FROM old_rows
+                ) AS moved GROUP BY menu_id HAVING sum(submenus) <> 0 OR sum(dishes) <> 0
+            ) AS delta;
+        END IF;
+
+        UPDATE menus SET
+            submenus_count = menus.submenus_count + delta.submenus,
+            dishes_count = menus.dishes_count + delta.dishes
+        FROM unnest(menu_ids, submenu_deltas, dish_deltas) AS delta (menu_id, submenus, dishes)
+        WHERE menus.id = delta.menu_id;
+        RETURN NULL;
+    END $$""",
+)
+
+TRIGGER_FUNCTIONS = {'dishes': 'count_dishes', 'submenus': 'count_submenus'}
+TRIGGER_EVENTS = {
+    'insert': 'INSERT ON {table} REFERENCING NEW TABLE AS new_rows',
+    'delete': 'DELETE ON {table} REFERENCING OLD TABLE AS old_rows',
+    'update': 'UPDATE ON {table} REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows',
+}
+
+
+class ReconcileReport(NamedTuple):
+    submenus: int
+    menus: int
+
+
+def counter_triggers(table: str, suffix: str = '') -> tuple[str, ...]:
+    """Function for getting statements creating counter functions and triggers of a table.
+
+    Triggers are statement level, every write statement updates counters of
+    every touched parent row once. Dishes update dishes_count of submenus,
+    submenus update submenus_count and dishes_count of menus, so changes of
+    dishes reach menus through their submenus. Rows deleted by cascade do not
+    update counters of parents deleted by the same statement.
+
+    table: Name of the table with counted rows: "dishes" or "submenus".
+    suffix: Suffix of the table name, e.g. "_shadow" for a table swapped in later.
+    """
+    return (*COUNTER_FUNCTIONS, *(
+        f'CREATE OR REPLACE TRIGGER {table}_count_{event} AFTER {events.format(table=table + suffix)} '
+        f'FOR EACH STATEMENT EXECUTE FUNCTION {TRIGGER_FUNCTIONS[table]}()'
+        for event, events in TRIGGER_EVENTS.items()
+    ))
+
+
+def reconcile_statements(suffix: str = '') -> tuple[str, str]:
+    """Function for getting statements recomputing counters of submenus and menus
+    in bulk, only rows with wrong counters are updated.
+
+    suffix: Suffix of the table names, e.g. "_shadow" for tables swapped in later.
+    """
+    menus, submenus, dishes = (f'{table}{suffix}' for table in ('menus', 'submenus', 'dishes'))
+    return (
+        f"""UPDATE {submenus} SET dishes_count = counted.dishes
+        FROM (
+            SELECT {submenus}.id, count({dishes}.id) AS dishes FROM {submenus}
+            LEFT JOIN {dishes} ON {dishes}.submenu_id = {submenus}.id GROUP BY {submenus}.id
+        ) AS counted
+        WHERE {submenus}.id = counted.id AND {submenus}.dishes_count <> counted.dishes""",
+        f"""UPDATE {menus} SET submenus_count = counted.submenus, dishes_count = counted.dishes
+        FROM (
+            SELECT {menus}.id, count({submenus}.id) AS submenus,
+                coalesce(sum({submenus}.dishes_count), 0) AS dishes
+            FROM {menus} LEFT JOIN {submenus} ON {submenus}.menu_id = {menus}.id GROUP BY {menus}.id
+        ) AS counted
+        WHERE {menus}.id = counted.id
+            AND ({menus}.submenus_count <> counted.submenus OR {menus}.dishes_count <> counted.dishes)""",
+    )
+
+
+async def reconcile_counters(conn: AsyncConnection, suffix: str = '') -> ReconcileReport:
+    """Function for recomputing counters of submenus and menus in bulk
+    and returning numbers of fixed rows. Writes to the tables are blocked
+    until the transaction ends, so counters can not change meanwhile.
+
+    conn: Database connection.
+    suffix: Suffix of the table names, e.g. "_shadow" for tables swapped in later.
+    """
+    await conn.execute(text(f'LOCK TABLE menus{suffix}, submenus{suffix}, dishes{suffix} IN SHARE MODE'))
+    submenus_sql, menus_sql = reconcile_statements(suffix)
+    submenus = (await conn.execute(text(submenus_sql))).rowcount
+    menus = (await conn.execute(text(menus_sql))).rowcount
+    return ReconcileReport(submenus, menus)
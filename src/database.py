@@ -1,9 +1,10 @@
 from typing import AsyncGenerator
 
 from redis.asyncio import Redis
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
+from src.cache.redis_pool import create_redis_pool
 from src.config import (
     DB_HOST,
     DB_NAME,
@@ -13,16 +14,19 @@ from src.config import (
     REDIS_HOST,
     REDIS_PORT,
 )
+from src.migrations import migrate
+from src.utils.db_pool import create_db_engine
 
 DATABASE_URL = f'postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
-redis = Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
+redis_pool = create_redis_pool(REDIS_HOST, REDIS_PORT)
+redis = Redis(connection_pool=redis_pool)
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_async_engine(DATABASE_URL)
+engine = create_db_engine(DATABASE_URL)
 async_session = async_sessionmaker(engine)
 
 
@@ -33,18 +37,28 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
 
 
 async def get_redis_client() -> AsyncGenerator[Redis, None]:
-    async with redis as client:
-        yield client
+    """Get Redis client sharing the connection pool of the process,
+    connections go back to the pool after every command."""
+    yield redis
 
 
-async def create_tables() -> None:
-    """Drop and recreate tables in db"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
+async def migrate_schema() -> int:
+    """Apply migrations newer than the db schema, keep data and return the schema version"""
+    return await migrate(engine)
 
 
-async def delete_cache() -> None:
-    """Clear all cache in redis"""
-    async with redis as client:
-        await client.flushdb()
+async def delete_cache(keep: tuple[str, ...] = ()) -> None:
+    """Clear all cache in redis except the kept keys.
+
+    keep: Keys whose values are restored after the clear.
+    """
+    values = await redis.mget(keep) if keep else []
+    await redis.flushdb()
+    kept = {key: value for key, value in zip(keep, values) if value is not None}
+    if kept:
+        await redis.mset(kept)
+
+
+async def close_redis() -> None:
+    """Disconnect all connections of the redis connection pool"""
+    await redis_pool.disconnect()
@@ -3,12 +3,18 @@ from typing import Any
 
 from fastapi import FastAPI
 
-from src.database import create_tables, delete_cache
+from src.cache.metrics import cache_metrics, load_hook
+from src.config import CACHE_METRICS_HOOK, CACHE_WARMUP
+from src.database import async_session, close_redis, delete_cache, migrate_schema, redis
 from src.router import main_router
+from src.service.cache_warmup_service import CacheWarmupService
+from src.task.tasks import SYNC_STATE_KEYS
+from src.utils.db_pool import CheckoutTimingMiddleware
 
 app = FastAPI(title='Restaurant API')
 
 app.include_router(main_router)
+app.add_middleware(CheckoutTimingMiddleware)
 
 
 def custom_openapi() -> dict[str, Any]:
@@ -19,9 +25,21 @@ def custom_openapi() -> dict[str, Any]:
 
 @app.on_event('startup')
 async def init_db() -> None:
-    """Recreate tables in db and clear all cache in redis after app launch"""
-    await create_tables()
-    await delete_cache()
+    """Migrate db schema and clear all cache in redis after app launch
+    (Excel sync counters and fingerprint are kept),
+    add the configured cache metrics hook and warm up the cache"""
+    await migrate_schema()
+    await delete_cache(keep=SYNC_STATE_KEYS)
+    if CACHE_METRICS_HOOK:
+        cache_metrics.add_hook(load_hook(CACHE_METRICS_HOOK))
+    if CACHE_WARMUP:
+        await CacheWarmupService().warm_up(async_session, redis)
+
+
+@app.on_event('shutdown')
+async def close_connections() -> None:
+    """Disconnect the redis connection pool before app shutdown"""
+    await close_redis()
 
 
 app.openapi = custom_openapi
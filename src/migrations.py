@@ -0,0 +1,118 @@
+import logging
+from typing import NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.counters import counter_triggers, reconcile_statements
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_LOCK_ID = 7_325_001
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    statements: tuple[str, ...]
+
+
+MIGRATIONS = (
+    Migration(1, 'Create menus, submenus and dishes', (
+        """CREATE TABLE IF NOT EXISTS menus (
+            id UUID NOT NULL,
+            title VARCHAR(80),
+            description TEXT NOT NULL,
+            PRIMARY KEY (id),
+            UNIQUE (title)
+        )""",
+        """CREATE TABLE IF NOT EXISTS submenus (
+            id UUID NOT NULL,
+            title VARCHAR(80),
+            description TEXT NOT NULL,
+            menu_id UUID NOT NULL,
+            PRIMARY KEY (id),
+            UNIQUE (title),
+            FOREIGN KEY (menu_id) REFERENCES menus (id) ON DELETE CASCADE
+        )""",
+        """CREATE TABLE IF NOT EXISTS dishes (
+            id UUID NOT NULL,
+            title VARCHAR(80),
+            description TEXT NOT NULL,
+            price DECIMAL(10, 2) NOT NULL,
+            submenu_id UUID NOT NULL,
+            discount DECIMAL(5, 2),
+            PRIMARY KEY (id),
+            UNIQUE (title),
+            FOREIGN KEY (submenu_id) REFERENCES submenus (id) ON DELETE CASCADE
+        )""",
+        'ALTER TABLE dishes ADD COLUMN IF NOT EXISTS discount DECIMAL(5, 2)',
+    )),
+    Migration(2, 'Index foreign keys of submenus and dishes', (
+        'CREATE INDEX IF NOT EXISTS ix_submenus_menu_id ON submenus (menu_id)',
+        'CREATE INDEX IF NOT EXISTS ix_dishes_submenu_id ON dishes (submenu_id)',
+    )),
+    Migration(3, 'Count submenus and dishes of menus and submenus', (
+        'ALTER TABLE menus ADD COLUMN IF NOT EXISTS submenus_count INTEGER DEFAULT 0 NOT NULL, '
+        'ADD COLUMN IF NOT EXISTS dishes_count INTEGER DEFAULT 0 NOT NULL',
+        'ALTER TABLE submenus ADD COLUMN IF NOT EXISTS dishes_count INTEGER DEFAULT 0 NOT NULL',
+        *reconcile_statements(),
+        *counter_triggers('submenus'),
+        *counter_triggers('dishes'),
+    )),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+async def get_schema_version(conn: AsyncConnection) -> int:
+    """Function for getting version of the db schema, 0 if no migration was applied.
+
+    conn: Database connection.
+    """
+    exists = await conn.scalar(text("SELECT to_regclass('schema_version') IS NOT NULL"))
+    if not exists:
+        return 0
+    return await conn.scalar(text('SELECT coalesce(max(version), 0) FROM schema_version'))
+
+
+async def migrate(engine: AsyncEngine) -> int:
+    """Function for applying migrations newer than the db schema and returning
+    the schema version. Every migration is applied once and recorded in
+    the schema_version table, data is never dropped. Migrations run in one
+    transaction under an advisory lock, so processes starting at once
+    apply them once. Schemas created before versioning (by create_all)
+    are adopted by the first migration. The statement timeout of the engine
+    is disabled for the transaction, so long backfills and waiting for
+    the lock held by another process do not abort the startup.
+
+    engine: Async db engine.
+    """
+    async with engine.begin() as conn:
+        await conn.execute(text('SET LOCAL statement_timeout = 0'))
+        await conn.execute(text('SELECT pg_advisory_xact_lock(:lock_id)'), {'lock_id': MIGRATION_LOCK_ID})
+        await conn.execute(text(
+            """CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER NOT NULL,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+                PRIMARY KEY (version)
+            )"""
+        ))
+        version = await get_schema_version(conn)
+        if version > SCHEMA_VERSION:
+            logger.warning('Db schema version %d is newer than the app schema version %d', version, SCHEMA_VERSION)
+            return version
+
+        for migration in MIGRATIONS:
+            if migration.version <= version:
+                continue
+            for statement in migration.statements:
+                await conn.execute(text(statement))
+            await conn.execute(
+                text('INSERT INTO schema_version (version, description) VALUES (:version, :description)'),
+                {'version': migration.version, 'description': migration.description},
+            )
+            logger.info('Applied migration %d: %s', migration.version, migration.description)
+            version = migration.version
+        return version
@@ -1,9 +1,20 @@
 import decimal
 import uuid
 
-from sqlalchemy import DECIMAL, TEXT, UUID, VARCHAR, ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import (
+    DDL,
+    DECIMAL,
+    INTEGER,
+    TEXT,
+    UUID,
+    VARCHAR,
+    ForeignKey,
+    event,
+    func,
+)
+from sqlalchemy.orm import Mapped, column_property, mapped_column
 
+from src.counters import counter_triggers
 from src.database import Base
 
 
@@ -18,6 +29,8 @@ class Menu(Base):
     id: Mapped[UUID] = mapped_column(UUID, primary_key=True, default=get_uuid)
     title: Mapped[str] = mapped_column(VARCHAR(80), nullable=True, unique=True)
     description: Mapped[str] = mapped_column(TEXT)
+    submenus_count: Mapped[int] = mapped_column(INTEGER, server_default='0')
+    dishes_count: Mapped[int] = mapped_column(INTEGER, server_default='0')
 
 
 class Submenu(Base):
@@ -26,7 +39,8 @@ class Submenu(Base):
     id: Mapped[UUID] = mapped_column(UUID, primary_key=True, default=get_uuid)
     title: Mapped[str] = mapped_column(VARCHAR(80), nullable=True, unique=True)
     description: Mapped[str] = mapped_column(TEXT)
-    menu_id: Mapped[UUID] = mapped_column(ForeignKey('menus.id', ondelete='CASCADE'))
+    menu_id: Mapped[UUID] = mapped_column(ForeignKey('menus.id', ondelete='CASCADE'), index=True)
+    dishes_count: Mapped[int] = mapped_column(INTEGER, server_default='0')
 
 
 class Dish(Base):
@@ -37,5 +51,14 @@ class Dish(Base):
     description: Mapped[str] = mapped_column(TEXT)
     price: Mapped[decimal.Decimal] = mapped_column(DECIMAL(10, 2))
     submenu_id: Mapped[UUID] = mapped_column(
-        ForeignKey('submenus.id', ondelete='CASCADE')
+        ForeignKey('submenus.id', ondelete='CASCADE'), index=True
     )
+    discount: Mapped[decimal.Decimal | None] = mapped_column(DECIMAL(5, 2), nullable=True)
+    discounted_price: Mapped[decimal.Decimal] = column_property(
+        func.round(price - price * func.coalesce(discount, 0) / 100, 2)
+    )
+
+
+for table in (Submenu.__table__, Dish.__table__):
+    for statement in counter_triggers(table.name):
+        event.listen(table, 'after_create', DDL(statement))
@@ -0,0 +1,26 @@
+"""Recompute submenus_count and dishes_count of all menus and submenus in bulk
+and print how many rows had wrong counters. Counters are kept by triggers,
+this fixes them after writes that bypassed the triggers (e.g. with
+session_replication_role = replica or manual restores). Runs without
+the statement timeout of the web engine.
+
+Usage: python -m src.reconcile_counters
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from src.counters import reconcile_counters
+from src.database import engine
+
+
+async def main() -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text('SET LOCAL statement_timeout = 0'))
+        report = await reconcile_counters(conn)
+    await engine.dispose()
+    print(f'Counters fixed: {report.submenus} submenus, {report.menus} menus')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
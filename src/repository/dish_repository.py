@@ -8,7 +8,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.models import Dish, Submenu
 from src.repository.submenu_repository import SubmenuRepository
 from src.schemas import RequestDish, ResponseDish, ResponseMessage
-from src.utils.excel_discounts import check_discount
 
 
 class DishRepository:
@@ -47,7 +46,7 @@ class DishRepository:
                 Dish.id,
                 Dish.title,
                 Dish.description,
-                Dish.price,
+                Dish.discounted_price.label('price'),
             )
             .outerjoin(Submenu, Submenu.id == submenu_id)
             .where(Submenu.menu_id == menu_id, Dish.submenu_id == submenu_id)
@@ -56,17 +55,7 @@ class DishRepository:
         if not rows:
             return []
 
-        dishes_list = list()
-        discounts = await check_discount()
-        for row in rows:
-            if row.id in discounts and discounts[row.id]:
-                dish = (dict(zip(self.col, row), **{'price': str(
-                    round(float(row[3]) - (float(row[3]) * discounts[row.id]), 2)
-                )}))
-                dishes_list.append(dish)
-            else:
-                dish = (dict(zip(self.col, row), **{'price': str(row[3])}))
-                dishes_list.append(dish)
+        dishes_list = [dict(zip(self.col, row), **{'price': str(row.price)}) for row in rows]
         return dishes_list
 
     async def get_by_id(
@@ -86,7 +75,7 @@ class DishRepository:
                 Dish.id,
                 Dish.title,
                 Dish.description,
-                Dish.price,
+                Dish.discounted_price.label('price'),
             )
             .outerjoin(Submenu, Submenu.id == submenu_id)
             .where(
@@ -100,17 +89,8 @@ class DishRepository:
         if not row:
             raise HTTPException(status_code=404, detail='dish not found')
 
-        discounts = await check_discount()
-
-        if row.id in discounts and discounts[row.id]:
-            dish = ResponseDish(
-                **dict(zip(self.col, row), **{'price': str(
-                    round(float(row[3]) - (float(row[3]) * discounts[row.id]), 2)
-                )})
-            )
-            return dish
         dish = ResponseDish(
-            **dict(zip(self.col, row), **{'price': str(round(row[3], 2))})
+            **dict(zip(self.col, row), **{'price': str(row.price)})
         )
         return dish
 
@@ -145,17 +125,12 @@ class DishRepository:
             )
 
         await session.commit()
-        query = await session.execute(select(Dish.id).where(
+        query = await session.execute(select(Dish.id, Dish.discounted_price).where(
             Dish.title == adding_dish['title']
         ))
 
-        dish_id = query.first().id
-        discounts = await check_discount()
-
-        if dish_id in discounts and discounts[dish_id]:
-            adding_dish['price'] = str(
-                round(float(adding_dish['price']) - (float(adding_dish['price']) * discounts[dish_id]), 2)
-            )
+        dish_id, adding_dish['price'] = query.first()
+        adding_dish['price'] = str(adding_dish['price'])
 
         dish = ResponseDish(**dict(adding_dish, **{'id': dish_id}))
         return dish
@@ -185,7 +160,7 @@ class DishRepository:
         updating_dish.price = str(round(new_dish.price, 2))
 
         try:
-            await session.execute(
+            query = await session.execute(
                 update(Dish).where(Dish.id == dish_id).values(
                     {
                         'id': updating_dish.id,
@@ -193,7 +168,7 @@ class DishRepository:
                         'description': updating_dish.description,
                         'price': updating_dish.price
                     }
-                )
+                ).returning(Dish.discounted_price)
             )
         except IntegrityError:
             await session.rollback()
@@ -201,15 +176,9 @@ class DishRepository:
                 status_code=409, detail='This title already exists'
             )
 
+        updating_dish.price = str(query.scalar_one())
         await session.commit()
 
-        discounts = await check_discount()
-
-        if dish_id in discounts and discounts[dish_id]:
-            updating_dish.price = str(
-                round(float(new_dish.price) - (float(new_dish.price) * discounts[dish_id]), 2)
-            )
-
         dish = ResponseDish(**dict(updating_dish))
         return dish
 
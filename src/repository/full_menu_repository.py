@@ -1,126 +1,67 @@
-from sqlalchemy import Row, func, select
+from sqlalchemy import TEXT, ColumnElement, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models import Dish, Menu, Submenu
-from src.schemas import ResponseFullDish, ResponseFullMenu, ResponseFullSubmenu
-from src.utils.excel_discounts import check_discount
 
 
-class FullMenuRepository:
-    """A class to prepare data from db for all_data handlers.
+def json_object(**fields: ColumnElement) -> ColumnElement:
+    """Function for building JSON object of the fields in db, keys keep the order of the fields.
 
-    Class variable:
-        dishes_subquery: Subquery for submenus_subquery.
-        submenus_subquery: Subquery for query.
-        query: Query to get all data from Menu, Submenu, Dish tables.
-
-    Methods:
-        get: Get data from db.
+    fields: Column expressions by JSON keys.
     """
-    dishes_subquery = (
-        select(
-            Dish.submenu_id.label('submenu_id'),
-            func.array_agg(func.row(Dish.id, Dish.title, Dish.description, Dish.price)).label('dishes_list'),
-        ).group_by(Dish.submenu_id).subquery()
-    )
-
-    submenus_subquery = (
-        select(
-            Submenu.menu_id.label('menu_id'),
-            func.array_agg(func.row(Submenu.id, Submenu.title, Submenu.description)).label('submenus_list'),
-            dishes_subquery.c.dishes_list.label('dishes_list'),
-        ).outerjoin(
-            Submenu, Submenu.id == dishes_subquery.c.submenu_id, full=True
-        ).group_by(
-            Submenu.id,
-            dishes_subquery.c.dishes_list
-        ).subquery()
-    )
-
-    query = select(
-        Menu.id,
-        Menu.title,
-        Menu.description,
-        submenus_subquery.c.submenus_list.label('submenus_list'),
-        submenus_subquery.c.dishes_list.label('dishes_list'),
-    ).outerjoin(
-        Menu, Menu.id == submenus_subquery.c.menu_id, full=True
-    ).group_by(
-        Menu.id,
-        submenus_subquery.c.submenus_list,
-        submenus_subquery.c.dishes_list
-    ).order_by(Menu.id)
+    return func.json_build_object(*(
+        item for key, value in fields.items() for item in (literal_column(f"'{key}'"), value)
+    ))
 
-    async def get(self, session: AsyncSession) -> list[ResponseFullMenu] | list:
-        """Get data from db, parse it, convert to json and return it.
-
-        session: Database session.
-        """
-        result = await session.execute(self.query)
 
-        full_menus_list = list()
-        for row in result.all():
-            full_menu_item = await self._parse_row(row)
-            full_menus_list.append(full_menu_item)
+def json_list(item: ColumnElement, order_by: ColumnElement) -> ColumnElement:
+    """Function for aggregating JSON objects to a JSON list in db, empty list without rows.
 
-        response = await self._create_json(full_menus_list)
-        return response
+    item: JSON object of a row.
+    order_by: Column the list is ordered by.
+    """
+    return func.coalesce(func.json_agg(aggregate_order_by(item, order_by)), literal_column("'[]'::json"))
 
-    @staticmethod
-    async def _parse_row(row: Row) -> ResponseFullMenu:
-        """Protected method for parsing data from db to pydantic schema.
 
-        row: One row of data from the database.
-        """
-        uuid, title, description, submenus_list, dishes_list = row
-        discounts = await check_discount()
+class FullMenuRepository:
+    """A class to prepare data from db for all_data handlers.
 
-        full_menu_item = ResponseFullMenu(**{
-            'id': uuid,
-            'title': title,
-            'description': description,
-            'submenus_list': []
-        })
-        if submenus_list:
-            full_menu_item.submenus_list.append(ResponseFullSubmenu(**{
-                'id': submenus_list[0][0],
-                'title': submenus_list[0][1],
-                'description': submenus_list[0][2],
-                'dishes_list': []
-            }))
-        if dishes_list:
-            for dish in dishes_list:
-                if dish[0] in discounts and discounts[dish[0]]:
-                    full_menu_item.submenus_list[0].dishes_list.append(ResponseFullDish(**{
-                        'id': dish[0],
-                        'title': dish[1],
-                        'description': dish[2],
-                        'price': str(
-                            round(float(dish[3]) - (float(dish[3]) * discounts[dish[0]]), 2)
-                        )
-                    }))
-                else:
-                    full_menu_item.submenus_list[0].dishes_list.append(ResponseFullDish(**{
-                        'id': dish[0],
-                        'title': dish[1],
-                        'description': dish[2],
-                        'price': str(round(dish[3], 2))
-                    }))
-        return full_menu_item
+    Class variable:
+        dishes_list: Subquery building JSON list of dishes of a submenu.
+        submenus_list: Subquery building JSON list of submenus of a menu.
+        query: Query building JSON list of all menus with submenus and dishes.
 
-    @staticmethod
-    async def _create_json(full_menus_list: list[ResponseFullMenu]) -> list[ResponseFullMenu]:
-        """Protected method for creating json from list of pydantic schemas.
-        Combining items by common ID.
+    Methods:
+        get: Get data from db.
+    """
+    dishes_list = select(json_list(json_object(
+        id=Dish.id,
+        title=Dish.title,
+        description=Dish.description,
+        price=cast(Dish.discounted_price, TEXT),
+    ), Dish.id)).where(Dish.submenu_id == Submenu.id).scalar_subquery()
+
+    submenus_list = select(json_list(json_object(
+        id=Submenu.id,
+        title=Submenu.title,
+        description=Submenu.description,
+        dishes_list=dishes_list,
+    ), Submenu.id)).where(Submenu.menu_id == Menu.id).scalar_subquery()
+
+    query = select(cast(json_list(json_object(
+        id=Menu.id,
+        title=Menu.title,
+        description=Menu.description,
+        submenus_list=submenus_list,
+    ), Menu.id), TEXT))
+
+    async def get(self, session: AsyncSession) -> bytes:
+        """Get from db list of menus with submenus and dishes as JSON response body
+        and return it. The whole tree is built by db in one query, dishes prices
+        come with discounts already applied.
 
-        full_menus_list: List of pydantic schemas "ResponseFullMenu".
+        session: Database session.
         """
-        full_menus_dict: dict = dict()
-        for item in full_menus_list:
-            if item.id in full_menus_dict:
-                if item.submenus_list:
-                    full_menus_dict[item.id].submenus_list.extend(item.submenus_list)
-            elif not (item.id in full_menus_dict):
-                full_menus_dict[item.id] = item
-        result = [values for values in full_menus_dict.values()]
-        return result
+        data = await session.scalar(self.query)
+        return data.encode()
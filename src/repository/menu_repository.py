@@ -1,11 +1,11 @@
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import delete, distinct, func, insert, select, update
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.models import Dish, Menu, Submenu
+from src.models import Menu
 from src.schemas import BaseRequestModel, ResponseMenu, ResponseMessage
 
 
@@ -36,12 +36,9 @@ class MenuRepository:
                 Menu.id,
                 Menu.title,
                 Menu.description,
-                func.count(distinct(Submenu.id)).label('submenus_count'),
-                func.count(distinct(Dish.id)).label('dishes_count'),
+                Menu.submenus_count,
+                Menu.dishes_count,
             )
-            .outerjoin(Submenu, Menu.id == Submenu.menu_id)
-            .outerjoin(Dish, Submenu.id == Dish.submenu_id)
-            .group_by(Menu.id)
         )
         rows = query.all()
         menus = [ResponseMenu(**(dict(zip(self.col, row)))) for row in rows]
@@ -61,13 +58,10 @@ class MenuRepository:
                 Menu.id,
                 Menu.title,
                 Menu.description,
-                func.count(distinct(Submenu.id)).label('submenus_count'),
-                func.count(distinct(Dish.id)).label('dishes_count'),
+                Menu.submenus_count,
+                Menu.dishes_count,
             )
-            .outerjoin(Submenu, Menu.id == Submenu.menu_id)
-            .outerjoin(Dish, Submenu.id == Dish.submenu_id)
             .where(Menu.id == menu_id)
-            .group_by(Menu.id)
         )
         row = query.first()
 
@@ -1,11 +1,11 @@
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import delete, distinct, func, insert, select, update
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.models import Dish, Submenu
+from src.models import Submenu
 from src.repository.menu_repository import MenuRepository
 from src.schemas import BaseRequestModel, ResponseMessage, ResponseSubmenu
 
@@ -46,11 +46,9 @@ class SubmenuRepository:
                 Submenu.id,
                 Submenu.title,
                 Submenu.description,
-                func.count(distinct(Dish.id)).label('dishes_count'),
+                Submenu.dishes_count,
             )
-            .outerjoin(Dish, Submenu.id == Dish.submenu_id)
             .where(Submenu.menu_id == menu_id)
-            .group_by(Submenu.id)
         )
         rows = query.all()
         if not rows:
@@ -74,11 +72,9 @@ class SubmenuRepository:
                 Submenu.id,
                 Submenu.title,
                 Submenu.description,
-                func.count(distinct(Dish.id)).label('dishes_count'),
+                Submenu.dishes_count,
             )
-            .outerjoin(Dish, Submenu.id == Dish.submenu_id)
             .where(Submenu.menu_id == menu_id, Submenu.id == submenu_id)
-            .group_by(Submenu.id)
         )
         row = query.first()
 
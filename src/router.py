@@ -3,6 +3,7 @@ from fastapi import APIRouter
 from src.api.dish_router import router as dish_router
 from src.api.full_menu_router import router as full_menu_router
 from src.api.menu_router import router as menu_router
+from src.api.stats_router import router as stats_router
 from src.api.submenu_router import router as submenu_router
 
 main_router = APIRouter()
@@ -25,3 +26,9 @@ main_router.include_router(
     prefix='/api/v1/all_data',
     tags=['Get all data']
 )
+
+main_router.include_router(
+    stats_router,
+    prefix='/api/v1/stats',
+    tags=['Stats']
+)
@@ -47,3 +47,46 @@ class ResponseFullSubmenu(BaseResponseModel):
 
 class ResponseFullMenu(BaseResponseModel):
     submenus_list: list[ResponseFullSubmenu] | list
+
+
+class ResponseRedisPoolStats(BaseModel):
+    max_connections: int
+    created: int
+    in_use: int
+    idle: int
+    waits: int
+    wait_timeouts: int
+
+
+class ResponseExcelSyncStats(BaseModel):
+    skipped: int
+    unchanged: int
+    applied: int
+
+
+class ResponseHistogram(BaseModel):
+    bounds: list[float]
+    counts: list[int]
+    count: int
+    sum: float
+
+
+class ResponseCacheStats(BaseModel):
+    hits: int
+    local_hits: int
+    stale_hits: int
+    misses: int
+    sets: int
+    invalidations: int
+    payload_bytes: ResponseHistogram
+    read_seconds: ResponseHistogram
+    build_seconds: ResponseHistogram
+
+
+class ResponseDbPoolStats(BaseModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    checkout_wait_seconds: ResponseHistogram
+    request_checkout_wait_seconds: ResponseHistogram
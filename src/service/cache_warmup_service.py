@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from functools import partial
+from typing import Any, NamedTuple
+
+from pydantic import TypeAdapter
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.cache.redis_cache import VERSION_KEY, Cache
+from src.config import CACHE_FULL_SOFT_TTL, CACHE_WARMUP_CONCURRENCY
+from src.models import Submenu
+from src.repository.dish_repository import DishRepository
+from src.repository.full_menu_repository import FullMenuRepository
+from src.repository.menu_repository import MenuRepository
+from src.repository.submenu_repository import SubmenuRepository
+from src.service.dish_service import dishes_adapter
+from src.service.full_menu_service import full_menu_adapter
+from src.service.menu_service import menu_adapter, menus_adapter
+from src.service.submenu_service import submenus_adapter
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupReport(NamedTuple):
+    keys: int
+    seconds: float
+
+
+class CacheWarmupService:
+    """A class to fill the cache with hot keys before they are requested.
+
+    Hot keys: list of menus ("all"), full menu ("full"), every menu, list of
+    submenus of every menu and list of dishes of every submenu. Only keys missing
+    from redis are built, so after a sync only the invalidated ones are. Menus come
+    from the list of menus, other keys are built from db with bounded concurrency,
+    every build in its own session. All keys are written in one MULTI pipeline and
+    only if no invalidation happened since the warm-up started.
+
+    Instance variable:
+        menu_repository: A class to prepare data from db for menu handlers.
+        submenu_repository: A class to prepare data from db for submenu handlers.
+        dish_repository: A class to prepare data from db for dish handlers.
+        full_menu_repository: A class to prepare data from db for all_data handlers.
+        redis_cache: A class instance for storing and handling the cache.
+        concurrency: Maximum number of keys built at once.
+
+    Methods:
+        warm_up: Build missing hot keys and write them to cache.
+    """
+
+    def __init__(self, concurrency: int = CACHE_WARMUP_CONCURRENCY):
+        self.menu_repository = MenuRepository()
+        self.submenu_repository = SubmenuRepository()
+        self.dish_repository = DishRepository()
+        self.full_menu_repository = FullMenuRepository()
+        self.redis_cache = Cache(use_local=False)
+        self.concurrency = concurrency
+
+    async def warm_up(self, async_session: async_sessionmaker, redis_client: Redis) -> WarmupReport:
+        """Build missing hot keys, write them to cache and return
+        the number of written keys and the duration.
+
+        async_session: Session factory of the db.
+        redis_client: Redis session.
+        """
+        start = time.perf_counter()
+        version = int(await redis_client.get(VERSION_KEY) or 0)
+        async with async_session() as session:
+            menus = await self.menu_repository.get_all(session)
+            submenus = (await session.execute(select(Submenu.menu_id, Submenu.id))).all()
+
+        builds: dict[str, tuple[Callable[[AsyncSession], Awaitable[Any]], TypeAdapter]] = {
+            'full': (self.full_menu_repository.get, full_menu_adapter),
+        }
+        for menu in menus:
+            builds[f'{menu.id}_all'] = (partial(self.submenu_repository.get_all, menu_id=menu.id), submenus_adapter)
+        for menu_id, submenu_id in submenus:
+            builds[f'{menu_id}_{submenu_id}_all'] = (
+                partial(self.dish_repository.get_all, menu_id=menu_id, submenu_id=submenu_id), dishes_adapter
+            )
+
+        keys = ['all', *(f'{menu.id}' for menu in menus), *builds]
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.exists(key)
+            missing = {key for key, exists in zip(keys, await pipe.execute()) if not exists}
+
+        batch = self.redis_cache.batch(redis_client)
+        if 'all' in missing:
+            batch.add_json('all', menus, menus_adapter)
+        for menu in menus:
+            if f'{menu.id}' in missing:
+                batch.add_json(f'{menu.id}', menu, menu_adapter)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        missing_builds = [(key, build) for key, build in builds.items() if key in missing]
+        values = await asyncio.gather(*[
+            self._build(async_session, semaphore, build) for _, (build, _) in missing_builds
+        ])
+        for (key, (_, adapter)), value in zip(missing_builds, values):
+            batch.add_json(key, value, adapter, CACHE_FULL_SOFT_TTL if key == 'full' else None)
+
+        written = len(missing) if await batch.flush(version) else 0
+        report = WarmupReport(written, time.perf_counter() - start)
+        if written < len(missing):
+            logger.info('Cache warm-up discarded %d keys invalidated while they were built', len(missing))
+        logger.info('Cache warm-up wrote %d keys in %.3f s', report.keys, report.seconds)
+        return report
+
+    @staticmethod
+    async def _build(
+        async_session: async_sessionmaker, semaphore: asyncio.Semaphore,
+        build: Callable[[AsyncSession], Awaitable[Any]]
+    ) -> Any:
+        """Protected method for getting data of a key from db in its own session
+        when the semaphore lets it.
+
+        async_session: Session factory of the db.
+        semaphore: Semaphore bounding the number of keys built at once.
+        build: Coroutine function getting data from db in the session.
+        """
+        async with semaphore, async_session() as session:
+            return await build(session)
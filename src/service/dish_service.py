@@ -1,6 +1,8 @@
+from functools import partial
 from uuid import UUID
 
-from fastapi import BackgroundTasks
+from fastapi import BackgroundTasks, Response
+from pydantic import TypeAdapter
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,6 +10,9 @@ from src.cache.redis_cache import Cache
 from src.repository.dish_repository import DishRepository
 from src.schemas import RequestDish, ResponseDish, ResponseMessage
 
+dish_adapter = TypeAdapter(ResponseDish)
+dishes_adapter = TypeAdapter(list[ResponseDish])
+
 
 class DishService:
     """A class to prepare data (adding caching) for dish handlers.
@@ -33,7 +38,7 @@ class DishService:
     async def get_all_dishes(
         self, session: AsyncSession, redis_client: Redis, menu_id: UUID,
         submenu_id: UUID, background_tasks: BackgroundTasks
-    ) -> list[ResponseDish]:
+    ) -> Response:
         """Get from db or cache all dishes and return it.
 
         session: Database session.
@@ -43,21 +48,17 @@ class DishService:
         background_tasks: class instance FastAPI BackgroundTasks
         "tasks to be run after returning a response".
         """
-        cache = await self.redis_cache.get(
-            redis_client, f'{menu_id}_{submenu_id}_all'
-        )
-        if cache is not None:
-            return cache
-        data = await self.dish_repository.get_all(session, menu_id, submenu_id)
-        background_tasks.add_task(
-            self.redis_cache.add, redis_client, f'{menu_id}_{submenu_id}_all', data
+        data = await self.redis_cache.get_json_or_build(
+            redis_client, f'{menu_id}_{submenu_id}_all',
+            partial(self.dish_repository.get_all, session, menu_id, submenu_id),
+            dishes_adapter,
         )
-        return data
+        return Response(data, media_type='application/json')
 
     async def get_dish_by_id(
         self, session: AsyncSession, redis_client: Redis, menu_id: UUID,
         submenu_id: UUID, dish_id: UUID, background_tasks: BackgroundTasks
-    ) -> ResponseDish:
+    ) -> Response:
         """Get from db or cache a specific dish by a specific ID and return it.
 
         session: Database session.
@@ -68,18 +69,12 @@ class DishService:
         background_tasks: class instance FastAPI BackgroundTasks
         "tasks to be run after returning a response".
         """
-        cache = await self.redis_cache.get(
-            redis_client, f'{menu_id}_{submenu_id}_{dish_id}'
-        )
-        if cache is not None:
-            return cache
-        data = await self.dish_repository.get_by_id(
-            session, menu_id, submenu_id, dish_id
+        data = await self.redis_cache.get_json_or_build(
+            redis_client, f'{menu_id}_{submenu_id}_{dish_id}',
+            partial(self.dish_repository.get_by_id, session, menu_id, submenu_id, dish_id),
+            dish_adapter,
         )
-        background_tasks.add_task(
-            self.redis_cache.add, redis_client, f'{menu_id}_{submenu_id}_{dish_id}', data
-        )
-        return data
+        return Response(data, media_type='application/json')
 
     async def add_dish(
         self, session: AsyncSession, redis_client: Redis, menu_id: UUID,
@@ -98,10 +93,10 @@ class DishService:
         data = await self.dish_repository.add(
             session, menu_id, submenu_id, new_menu
         )
-        background_tasks.add_task(self.redis_cache.cascade_delete, redis_client, f'{menu_id}')
-        background_tasks.add_task(
-            self.redis_cache.add, redis_client, f'{menu_id}_{submenu_id}_{data.id}', data
-        )
+        batch = self.redis_cache.batch(redis_client, background_tasks)
+        batch.delete('all')
+        batch.delete_tree(f'{menu_id}')
+        batch.add_json(f'{menu_id}_{submenu_id}_{data.id}', data, dish_adapter)
         return data
 
     async def update_dish(
@@ -122,12 +117,9 @@ class DishService:
         data = await self.dish_repository.update(
             session, menu_id, submenu_id, dish_id, new_menu
         )
-        background_tasks.add_task(
-            self.redis_cache.delete, redis_client, f'{menu_id}_{submenu_id}_all'
-        )
-        background_tasks.add_task(
-            self.redis_cache.add, redis_client, f'{menu_id}_{submenu_id}_{data.id}', data
-        )
+        batch = self.redis_cache.batch(redis_client, background_tasks)
+        batch.delete(f'{menu_id}_{submenu_id}_all')
+        batch.add_json(f'{menu_id}_{submenu_id}_{data.id}', data, dish_adapter)
         return data
 
     async def delete_dish(
@@ -144,7 +136,9 @@ class DishService:
         background_tasks: class instance FastAPI BackgroundTasks
         "tasks to be run after returning a response".
         """
-        background_tasks.add_task(self.redis_cache.cascade_delete, redis_client, f'{menu_id}')
+        batch = self.redis_cache.batch(redis_client, background_tasks)
+        batch.delete('all')
+        batch.delete_tree(f'{menu_id}')
         return await self.dish_repository.delete(
             session, menu_id, submenu_id, dish_id
         )
@@ -1,11 +1,17 @@
-from fastapi import BackgroundTasks
+from functools import partial
+
+from fastapi import BackgroundTasks, Response
+from pydantic import TypeAdapter
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.cache.redis_cache import Cache
+from src.config import CACHE_FULL_SOFT_TTL
 from src.repository.full_menu_repository import FullMenuRepository
 from src.schemas import ResponseFullMenu
 
+full_menu_adapter = TypeAdapter(list[ResponseFullMenu])
+
 
 class FullMenuService:
     """A class to prepare data (adding caching) for all_data handlers.
@@ -24,7 +30,7 @@ class FullMenuService:
 
     async def get_full_menu(
         self, session: AsyncSession, redis_client: Redis, background_task: BackgroundTasks
-    ) -> list[ResponseFullMenu] | list:
+    ) -> Response:
         """Get data from db or cache and return it.
 
         session: Database session.
@@ -32,9 +38,8 @@ class FullMenuService:
         background_task: class instance FastAPI BackgroundTasks
         "tasks to be run after returning a response".
         """
-        cache = await self.redis_cache.get(redis_client, 'full')
-        if cache is not None:
-            return cache
-        data = await self.full_menu_repository.get(session)
-        background_task.add_task(self.redis_cache.add, redis_client, 'full', data)
-        return data
+        data = await self.redis_cache.get_json_or_revalidate(
+            redis_client, 'full', partial(self.full_menu_repository.get, session), full_menu_adapter,
+            CACHE_FULL_SOFT_TTL, background_task
+        )
+        return Response(data, media_type='application/json')
@@ -1,6 +1,8 @@
+from functools import partial
 from uuid import UUID
 
-from fastapi import BackgroundTasks
+from fastapi import BackgroundTasks, Response
+from pydantic import TypeAdapter
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,6 +10,9 @@ from src.cache.redis_cache import Cache
 from src.repository.menu_repository import MenuRepository
 from src.schemas import BaseRequestModel, ResponseMenu, ResponseMessage
 
+menu_adapter = TypeAdapter(ResponseMenu)
+menus_adapter = TypeAdapter(list[ResponseMenu])
+
 
 class MenuService:
     """A class to prepare data (adding caching) for menu handlers.
@@ -33,7 +38,7 @@ class MenuService:
 
     async def get_all_menus(
         self, session: AsyncSession, redis_client: Redis, background_tasks: BackgroundTasks
-    ) -> list[ResponseMenu]:
+    ) -> Response:
         """Get from db or cache all menus and return it.
 
         session: Database session.
@@ -41,17 +46,15 @@ class MenuService:
         background_tasks: class instance FastAPI BackgroundTasks
         "tasks to be run after returning a response".
         """
-        cache = await self.redis_cache.get(redis_client, 'all')
-        if cache is not None:
-            return cache
-        data = await self.menu_repository.get_all(session)
-        background_tasks.add_task(self.redis_cache.add, redis_client, 'all', data)
-        return data
+        data = await self.redis_cache.get_json_or_build(
+            redis_client, 'all', partial(self.menu_repository.get_all, session), menus_adapter
+        )
+        return Response(data, media_type='application/json')
 
     async def get_menu_by_id(
         self, session: AsyncSession, redis_client: Redis, menu_id: UUID,
         background_tasks: BackgroundTasks
-    ) -> ResponseMenu:
+    ) -> Response:
         """Get from db or cache a specific menu by a specific ID and return it.
 
         session: Database session.
@@ -60,12 +63,10 @@ class MenuService:
         background_tasks: class instance FastAPI BackgroundTasks
         "tasks to be run after returning a response".
         """
-        cache = await self.redis_cache.get(redis_client, f'{menu_id}')
-        if cache:
-            return cache
-        data = await self.menu_repository.get_by_id(session, menu_id)
-        background_tasks.add_task(self.redis_cache.add, redis_client, f'{menu_id}', data)
-        return data
+        data = await self.redis_cache.get_json_or_build(
+            redis_client, f'{menu_id}', partial(self.menu_repository.get_by_id, session, menu_id), menu_adapter
+        )
+        return Response(data, media_type='application/json')
 
     async def add_menu(
         self, session: AsyncSession, redis_client: Redis,
@@ -80,8 +81,9 @@ class MenuService:
         "tasks to be run after returning a response".
         """
         data = await self.menu_repository.add(session, new_menu)
-        background_tasks.add_task(self.redis_cache.delete, redis_client, 'all')
-        background_tasks.add_task(self.redis_cache.add, redis_client, f'{data.id}', data)
+        batch = self.redis_cache.batch(redis_client, background_tasks)
+        batch.delete('all')
+        batch.add_json(f'{data.id}', data, menu_adapter)
         return data
 
     async def update_menu(
@@ -98,8 +100,9 @@ class MenuService:
         "tasks to be run after returning a response".
         """
         data = await self.menu_repository.update(session, menu_id, new_menu)
-        background_tasks.add_task(self.redis_cache.delete, redis_client, 'all')
-        background_tasks.add_task(self.redis_cache.add, redis_client, f'{data.id}', data)
+        batch = self.redis_cache.batch(redis_client, background_tasks)
+        batch.delete('all')
+        batch.add_json(f'{data.id}', data, menu_adapter)
         return data
 
     async def delete_menu(
@@ -114,5 +117,7 @@ class MenuService:
         background_tasks: class instance FastAPI BackgroundTasks
         "tasks to be run after returning a response".
         """
-        background_tasks.add_task(self.redis_cache.cascade_delete, redis_client, f'{menu_id}')
+        batch = self.redis_cache.batch(redis_client, background_tasks)
+        batch.delete('all')
+        batch.delete_tree(f'{menu_id}')
         return await self.menu_repository.delete(session, menu_id)
@@ -1,6 +1,8 @@
+from functools import partial
 from uuid import UUID
 
-from fastapi import BackgroundTasks
+from fastapi import BackgroundTasks, Response
+from pydantic import TypeAdapter
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,6 +10,9 @@ from src.cache.redis_cache import Cache
 from src.repository.submenu_repository import SubmenuRepository
 from src.schemas import BaseRequestModel, ResponseMessage, ResponseSubmenu
 
+submenu_adapter = TypeAdapter(ResponseSubmenu)
+submenus_adapter = TypeAdapter(list[ResponseSubmenu])
+
 
 class SubmenuService:
     """A class to prepare data (adding caching) for submenu handlers.
@@ -35,7 +40,7 @@ class SubmenuService:
     async def get_all_submenus(
         self, session: AsyncSession, redis_client: Redis, menu_id: UUID,
         background_tasks: BackgroundTasks
-    ) -> list[ResponseSubmenu]:
+    ) -> Response:
         """Get from db or cache all submenus and return it.
 
         session: Database session.
@@ -44,19 +49,15 @@ class SubmenuService:
         background_tasks: class instance FastAPI BackgroundTasks
         "tasks to be run after returning a response".
         """
-        cache = await self.redis_cache.get(redis_client, f'{menu_id}_all')
-        if cache is not None:
-            return cache
-        data = await self.submenu_repository.get_all(session, menu_id)
-        background_tasks.add_task(
-            self.redis_cache.add, redis_client, f'{menu_id}_all', data
+        data = await self.redis_cache.get_json_or_build(
+            redis_client, f'{menu_id}_all', partial(self.submenu_repository.get_all, session, menu_id), submenus_adapter
         )
-        return data
+        return Response(data, media_type='application/json')
 
     async def get_submenu_by_id(
         self, session: AsyncSession, redis_client: Redis, menu_id: UUID,
         submenu_id: UUID, background_tasks: BackgroundTasks
-    ) -> ResponseSubmenu:
+    ) -> Response:
         """Get from db or cache a specific submenu by a specific ID and return it.
 
         session: Database session.
@@ -66,18 +67,12 @@ class SubmenuService:
         background_tasks: class instance FastAPI BackgroundTasks
         "tasks to be run after returning a response".
         """
-        cache = await self.redis_cache.get(
-            redis_client, f'{menu_id}_{submenu_id}'
-        )
-        if cache:
-            return cache
-        data = await self.submenu_repository.get_by_id(
-            session, menu_id, submenu_id
+        data = await self.redis_cache.get_json_or_build(
+            redis_client, f'{menu_id}_{submenu_id}',
+            partial(self.submenu_repository.get_by_id, session, menu_id, submenu_id),
+            submenu_adapter,
         )
-        background_tasks.add_task(
-            self.redis_cache.add, redis_client, f'{menu_id}_{submenu_id}', data
-        )
-        return data
+        return Response(data, media_type='application/json')
 
     async def add_submenu(
         self, session: AsyncSession, redis_client: Redis, menu_id: UUID,
@@ -93,12 +88,9 @@ class SubmenuService:
         "tasks to be run after returning a response".
         """
         data = await self.submenu_repository.add(session, menu_id, new_menu)
-        background_tasks.add_task(
-            self.redis_cache.multiply_delete, redis_client, ['all', f'{menu_id}_all', f'{menu_id}']
-        )
-        background_tasks.add_task(
-            self.redis_cache.add, redis_client, f'{menu_id}_{data.id}', data
-        )
+        batch = self.redis_cache.batch(redis_client, background_tasks)
+        batch.delete('all', f'{menu_id}_all', f'{menu_id}')
+        batch.add_json(f'{menu_id}_{data.id}', data, submenu_adapter)
         return data
 
     async def update_submenu(
@@ -118,8 +110,9 @@ class SubmenuService:
         data = await self.submenu_repository.update(
             session, menu_id, submenu_id, new_menu
         )
-        background_tasks.add_task(self.redis_cache.delete, redis_client, f'{menu_id}_all')
-        background_tasks.add_task(self.redis_cache.add, redis_client, f'{menu_id}_{data.id}', data)
+        batch = self.redis_cache.batch(redis_client, background_tasks)
+        batch.delete(f'{menu_id}_all')
+        batch.add_json(f'{menu_id}_{data.id}', data, submenu_adapter)
         return data
 
     async def delete_submenu(
@@ -135,5 +128,7 @@ class SubmenuService:
         background_tasks: class instance FastAPI BackgroundTasks
         "tasks to be run after returning a response".
         """
-        background_tasks.add_task(self.redis_cache.cascade_delete, redis_client, f'{menu_id}')
+        batch = self.redis_cache.batch(redis_client, background_tasks)
+        batch.delete('all')
+        batch.delete_tree(f'{menu_id}')
         return await self.submenu_repository.delete(session, menu_id, submenu_id)
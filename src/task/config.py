@@ -9,6 +9,9 @@ from src.config import (
     BROKER_PASS,
     BROKER_PORT,
     BROKER_USER,
+    EXCEL_POLL_FALLBACK_INTERVAL,
+    EXCEL_POLL_INTERVAL,
+    EXCEL_SYNC_MODE,
 )
 
 CELERY_BROKER = f'pyamqp://{BROKER_USER}:{BROKER_PASS}@{BROKER_HOST}:{BROKER_PORT}//'
@@ -23,10 +26,12 @@ celery_app.conf.update(
     result_expires=3600,
 )
 
+# In watcher mode Excel file is checked on file changes by src.task.watcher,
+# polling stays as a rare fallback in case some events were missed.
 celery_app.conf.beat_schedule = {
-    'check-excel-every-15-seconds': {
+    'check-excel': {
         'task': 'check_excel',
-        'schedule': 15.0,
+        'schedule': EXCEL_POLL_INTERVAL if EXCEL_SYNC_MODE == 'polling' else EXCEL_POLL_FALLBACK_INTERVAL,
     },
 }
 
@@ -0,0 +1,97 @@
+import asyncio
+from collections.abc import Coroutine
+from typing import Any
+
+from celery.signals import worker_process_init, worker_process_shutdown
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from src.cache.metrics import cache_metrics, load_hook
+from src.cache.redis_pool import create_redis_pool
+from src.config import (
+    CACHE_METRICS_HOOK,
+    DB_WORKER_STATEMENT_TIMEOUT,
+    REDIS_HOST,
+    REDIS_PORT,
+)
+from src.database import DATABASE_URL, async_session, engine, redis
+from src.utils.db_pool import create_db_engine
+
+
+class WorkerRuntime:
+    """A class holding event loop, db engine and redis client of a celery worker process.
+
+    Outside of a worker process (web app, Excel watcher, tests) shared objects
+    from src.database are used, so the same task code runs everywhere.
+
+    Instance variable:
+        loop: Event loop living as long as the worker process.
+        engine: Async db engine with a worker scoped connection pool and the worker statement timeout,
+        so long Excel loads are not aborted by the timeout of API requests.
+        async_session: Session factory bound to the engine.
+        redis: Redis client with a worker scoped connection pool.
+
+    Methods:
+        start: Create event loop, db engine and redis client for the worker process.
+        run: Run coroutine in the worker event loop and return its result.
+        stop: Dispose db engine and redis client and close event loop.
+    """
+
+    def __init__(self):
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.engine: AsyncEngine = engine
+        self.async_session: async_sessionmaker = async_session
+        self.redis: Redis = redis
+
+    def start(
+        self, database_url: str = DATABASE_URL, redis_host: str | None = REDIS_HOST,
+        redis_port: str | None = REDIS_PORT
+    ) -> None:
+        """Create event loop, db engine and redis client for the worker process.
+
+        database_url: Database URL.
+        redis_host: Redis host.
+        redis_port: Redis port.
+        """
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.engine = create_db_engine(database_url, DB_WORKER_STATEMENT_TIMEOUT)
+        self.async_session = async_sessionmaker(self.engine)
+        self.redis = Redis(connection_pool=create_redis_pool(redis_host, redis_port))
+
+    def run(self, coroutine: Coroutine[Any, Any, Any]) -> Any:
+        """Run coroutine in the worker event loop and return its result.
+        The runtime is started on first use if the worker process did not start it
+        (for example with the solo pool).
+
+        coroutine: Coroutine to run.
+        """
+        if self.loop is None:
+            self.start()
+        assert self.loop is not None
+        return self.loop.run_until_complete(coroutine)
+
+    def stop(self) -> None:
+        """Dispose db engine and redis client and close event loop."""
+        if self.loop is None:
+            return
+        self.loop.run_until_complete(self.redis.connection_pool.disconnect())
+        self.loop.run_until_complete(self.engine.dispose())
+        self.loop.close()
+        self.loop = None
+        self.engine, self.async_session, self.redis = engine, async_session, redis
+
+
+runtime = WorkerRuntime()
+
+
+@worker_process_init.connect
+def start_worker_runtime(**kwargs: Any) -> None:
+    runtime.start()
+    if CACHE_METRICS_HOOK:
+        cache_metrics.add_hook(load_hook(CACHE_METRICS_HOOK))
+
+
+@worker_process_shutdown.connect
+def stop_worker_runtime(**kwargs: Any) -> None:
+    runtime.stop()
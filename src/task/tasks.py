@@ -1,231 +1,447 @@
-import asyncio
+import pickle
 from typing import Any
 from uuid import UUID
 
-import pandas as pd
-from _decimal import Decimal
-from fastapi import HTTPException
-from sqlalchemy import INT
-from sqlalchemy import UUID as sql_uuid
-from sqlalchemy import Row, Sequence, insert, literal_column, select
+import numpy as np
+from redis.asyncio import Redis
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 
 from src.cache.redis_cache import Cache
-from src.database import async_session, create_tables, delete_cache, redis
+from src.config import CACHE_WARMUP
+from src.counters import counter_triggers, reconcile_counters
 from src.models import Dish, Menu, Submenu
+from src.service.cache_warmup_service import CacheWarmupService
 from src.task.config import celery_app, menu_excel_path
-from src.utils.excel_discounts import different_between_discounts
+from src.task.runtime import runtime
+from src.utils.excel_parser import read_excel_batches, to_decimals
+from src.utils.file_fingerprint import file_digest, file_stat_key
 
-global_menu_id = None
-global_submenu_id = None
+CatalogData = dict[str, dict[UUID, tuple[Any, ...]]]
+
+MODELS = {
+    'menus': Menu,
+    'submenus': Submenu,
+    'dishes': Dish,
+}
+
+COLUMNS = {
+    'menus': ('id', 'title', 'description'),
+    'submenus': ('id', 'title', 'description', 'menu_id'),
+    'dishes': ('id', 'title', 'description', 'price', 'submenu_id', 'discount'),
+}
+
+
+BULK_LOAD_THRESHOLD = 1000
+EXCEL_SYNC_LOCK_ID = 7_325_002
+
+FINGERPRINT_KEY = 'excel_fingerprint'
+SYNC_STATS_KEYS = {
+    'skipped': 'excel_sync_skipped',
+    'unchanged': 'excel_sync_unchanged',
+    'applied': 'excel_sync_applied',
+}
+# kept by the startup cache clear, so check counters and the fingerprint survive web restarts
+SYNC_STATE_KEYS = (FINGERPRINT_KEY, *SYNC_STATS_KEYS.values())
+
+
+class ExcelSyncError(Exception):
+    """Excel file data violates db constraints (for example duplicate titles)."""
 
 
 @celery_app.task(name='check_excel')
 def create_task() -> str:
     """Create a celery task and return string message about task status"""
-    loop = asyncio.get_event_loop()
-    result = loop.run_until_complete(compare_data())
+    result = runtime.run(check_excel())
+    return result
+
+
+async def check_excel() -> str:
+    """Compare Excel file with db only if the file has changed since the last
+    applied comparison or db data is not in cache anymore (db was changed
+    through the API). Fingerprint of the file is checked by mtime and size
+    first and by content hash only if they differ, it is stored in redis
+    after every comparison. Runs are counted in redis.
+    Checks of all processes run one at a time under a db advisory lock,
+    a check started meanwhile waits and compares the file after it.
+    The lock is held by its own connection outside of a transaction,
+    so the connection is not left idle in transaction during the check.
+    """
+    async with runtime.engine.connect() as lock_connection:
+        await lock_connection.execute(text('SET LOCAL statement_timeout = 0'))
+        await lock_connection.execute(text('SELECT pg_advisory_lock(:lock_id)'), {'lock_id': EXCEL_SYNC_LOCK_ID})
+        await lock_connection.commit()
+        try:
+            return await _check_excel()
+        finally:
+            await lock_connection.execute(
+                text('SELECT pg_advisory_unlock(:lock_id)'), {'lock_id': EXCEL_SYNC_LOCK_ID}
+            )
+            await lock_connection.commit()
+
+
+async def _check_excel() -> str:
+    """Protected function for comparing Excel file with db if its fingerprint changed."""
+    stat_key = file_stat_key(menu_excel_path)
+    if stat_key is None:
+        return 'Excel file not found'
+
+    client = runtime.redis
+    fingerprint = await client.get(FINGERPRINT_KEY)
+    fingerprint = pickle.loads(fingerprint) if fingerprint else None
+
+    if fingerprint is not None and await client.exists('db_data'):
+        if fingerprint['stat_key'] == stat_key:
+            await client.incr(SYNC_STATS_KEYS['skipped'])
+            return 'Excel file not changed, comparison skipped'
+        digest = file_digest(menu_excel_path)
+        if fingerprint['digest'] == digest:
+            fingerprint['stat_key'] = stat_key
+            await client.set(FINGERPRINT_KEY, pickle.dumps(fingerprint))
+            await client.incr(SYNC_STATS_KEYS['skipped'])
+            return 'Excel file not changed, comparison skipped'
+    else:
+        digest = file_digest(menu_excel_path)
+
+    result = await compare_data()
+
+    await client.set(FINGERPRINT_KEY, pickle.dumps({'stat_key': stat_key, 'digest': digest}))
+    if result == 'No changes found':
+        await client.incr(SYNC_STATS_KEYS['unchanged'])
+    else:
+        await client.incr(SYNC_STATS_KEYS['applied'])
     return result
 
 
-async def _read_excel_file(path: str) -> tuple[list[Any], dict[str, list]]:
-    """Protected function for read Excel file,
-    prepare list of data to compare with db data and
-    prepare dict of data to deleting None and adding to db.
+async def get_sync_stats(client: Redis | None = None) -> dict[str, int]:
+    """Get counters of Excel file checks: skipped by unchanged fingerprint,
+    compared without changes and compared with applied changes.
+    Counters are kept in redis, they are not reset by the startup cache clear.
+
+    client: Redis session, the client of the runtime by default.
+    """
+    values = await (client or runtime.redis).mget(list(SYNC_STATS_KEYS.values()))
+    return {name: int(value or 0) for name, value in zip(SYNC_STATS_KEYS, values)}
+
+
+async def _read_excel_file(path: str) -> CatalogData:
+    """Protected function for read Excel file and
+    prepare data in the shape of data from "_get_data_from_db".
 
     path: Excel file path.
     """
-    data = pd.read_excel(path, header=None)
-    excel_data_list = []
-    excel_data_dict: dict = {
-        'menus': [],
-        'submenus': [],
-        'dishes': [],
+    menus, submenus, dishes = read_excel_batches(path)
+    excel_data: CatalogData = {
+        'menus': dict(zip(
+            menus.id, zip(menus.title, _descriptions(menus.description))
+        )),
+        'submenus': dict(zip(
+            submenus.id, zip(submenus.title, _descriptions(submenus.description), submenus.menu_id)
+        )),
+        'dishes': dict(zip(dishes.id, zip(
+            dishes.title, _descriptions(dishes.description), to_decimals(dishes.price),
+            dishes.submenu_id, to_decimals(dishes.discount)
+        ))),
     }
 
-    for idx, row in data.iterrows():
-        row_data = row.values
-        data_as_sql, item_category = await _create_data_for_bd(row_data)
-        excel_data_list.append(data_as_sql)
-        if item_category == 'menu':
-            excel_data_dict['menus'].append(data_as_sql)
-        elif item_category == 'submenu':
-            excel_data_dict['submenus'].append(data_as_sql)
-        elif item_category == 'dish':
-            excel_data_dict['dishes'].append(data_as_sql[:5])
+    return excel_data
 
-    return excel_data_list, excel_data_dict
 
+def _descriptions(values: np.ndarray) -> np.ndarray:
+    """Protected function for replacing missing descriptions with "null"
+    as they are stored in db.
 
-async def _create_data_for_bd(row_data: tuple) -> tuple[Any, str]:
-    """Protected function for preparing data to add to db and
-    returning tuple of data and item category.
-    Global variables are used to populate the bound id column.
-
-    row_data: row of value from Excel file.
+    values: Description column from Excel batch.
     """
-    global global_menu_id
-    global global_submenu_id
-
-    data_as_sql = []
-
-    if not pd.isnull(row_data[0]):
-        data_as_sql.extend([
-            UUID(row_data[0]),
-            row_data[1],
-            row_data[2] if not pd.isnull(row_data[2]) else 'null',
-            None,
-            None,
-        ])
-        global_menu_id = row_data[0]
-        return tuple(data_as_sql), 'menu'
-    else:
-        if not pd.isnull(row_data[1]):
-            data_as_sql.extend([
-                UUID(row_data[1]),
-                row_data[2],
-                row_data[3] if not pd.isnull(row_data[3]) else 'null',
-                None,
-                UUID(global_menu_id),
-            ])
-            global_submenu_id = row_data[1]
-            return tuple(data_as_sql), 'submenu'
-        else:
-            if not pd.isnull(row_data[2]):
-                if len(row_data) == 7:
-                    data_as_sql.extend([
-                        UUID(row_data[2]),
-                        row_data[3],
-                        row_data[4] if not pd.isnull(row_data[4]) else 'null',
-                        round(Decimal(row_data[5]), 2),
-                        UUID(global_submenu_id),
-                        row_data[6] if not pd.isnull(row_data[6]) else None,
-                    ])
-                    return tuple(data_as_sql), 'dish'
-                else:
-                    data_as_sql.extend([
-                        UUID(row_data[2]),
-                        row_data[3],
-                        row_data[4] if not pd.isnull(row_data[4]) else 'null',
-                        round(Decimal(row_data[5]), 2),
-                        UUID(global_submenu_id),
-                    ])
-                    return tuple(data_as_sql), 'dish'
-    return data_as_sql, 'menu'
-
-
-async def _get_data_from_db() -> Sequence[Row[tuple[Any]]]:
+    return np.where(np.not_equal(values, None), values, 'null')
+
+
+async def _get_data_from_db() -> CatalogData:
     """Protected function for getting data from db or cache and
     if there is no data in cache, add it there.
+    Data of every table is a dictionary of row values by row ID.
+    Local cache is not used, the comparison must see every API change at once.
     """
-    query = select(
-        Menu.id,
-        Menu.title.label('title'),
-        Menu.description,
-        literal_column('null', type_=INT).label('price'),
-        literal_column('null', type_=sql_uuid).label('some_id'),
-    ).union_all(
-        select(
-            Submenu.id,
-            Submenu.title.label('title'),
-            Submenu.description,
-            literal_column('null', type_=INT).label('price'),
-            Submenu.menu_id,
-        ).union_all(
-            select(
-                Dish.id,
-                Dish.title.label('title'),
-                Dish.description,
-                Dish.price,
-                Dish.submenu_id
-            )
-        )
-    ).order_by('title')
-
-    async with redis as client:
-        cache = Cache()
-        cache_data = await cache.get(client, 'db_data')
+    client = runtime.redis
+    cache = Cache(use_local=False)
+    cache_data = await cache.get(client, 'db_data')
 
     if cache_data is not None:
         return cache_data
 
-    async with async_session() as session:
-        response = await session.execute(query)
-
-    result = response.all()
+    result: CatalogData = dict()
+    async with runtime.async_session() as session:
+        for key, model in MODELS.items():
+            response = await session.execute(
+                select(*[getattr(model, column) for column in COLUMNS[key]])
+            )
+            result[key] = {row[0]: tuple(row[1:]) for row in response.all()}
 
-    async with redis as client:
-        cache = Cache()
-        await cache.add(client, 'db_data', result)
+    await cache.add(client, 'db_data', result)
 
     return result
 
 
-async def compare_data() -> str:
-    """Compares the data from the Excel file and the db and,
-    if the data differs, deletes the db and fills it with data from the Excel file.
+def _get_changes(db_data: CatalogData, excel_data: CatalogData) -> dict[str, dict[str, list[UUID]]]:
+    """Protected function for getting IDs of rows to insert, update
+    and delete for every table and returning them.
+
+    db_data: Data from db.
+    excel_data: Data from Excel file.
+    """
+    changes = dict()
+    for key in MODELS:
+        old, new = db_data[key], excel_data[key]
+        changes[key] = {
+            'insert': [item_id for item_id in new if item_id not in old],
+            'update': [item_id for item_id in new if item_id in old and new[item_id] != old[item_id]],
+            'delete': [item_id for item_id in old if item_id not in new],
+        }
+    return changes
+
+
+def _get_touched_menus(
+    changes: dict[str, dict[str, list[UUID]]], db_data: CatalogData, excel_data: CatalogData
+) -> set[UUID]:
+    """Protected function for getting IDs of menus whose data has been changed,
+    both before and after the change.
+
+    changes: IDs of rows to insert, update and delete for every table.
+    db_data: Data from db.
+    excel_data: Data from Excel file.
     """
-    sql_data = await _get_data_from_db()
+    touched_menus = set()
+    for key, item_ids in changes.items():
+        for item_id in item_ids['insert'] + item_ids['update'] + item_ids['delete']:
+            for data in (db_data, excel_data):
+                if key == 'menus':
+                    touched_menus.add(item_id)
+                elif key == 'submenus' and item_id in data['submenus']:
+                    touched_menus.add(data['submenus'][item_id][2])
+                elif key == 'dishes' and item_id in data['dishes']:
+                    submenu_id = data['dishes'][item_id][3]
+                    if submenu_id in data['submenus']:
+                        touched_menus.add(data['submenus'][submenu_id][2])
+    return touched_menus
+
+
+async def _apply_changes(
+    session: AsyncSession, changes: dict[str, dict[str, list[UUID]]], excel_data: CatalogData
+) -> None:
+    """Protected function for applying changes to db in the session transaction.
+    Deleted dishes go first to free their titles, then rows are inserted and
+    updated from parents to children with one upsert, and only then deleted
+    submenus and menus are removed, so children moved out of them
+    are not deleted by cascade.
+
+    session: Database session.
+    changes: IDs of rows to insert, update and delete for every table.
+    excel_data: Data from Excel file.
+    """
+    await _delete(session, 'dishes', changes['dishes']['delete'])
 
-    excel_data_list, excel_data_dict = await _read_excel_file(menu_excel_path)
-    excel_data_list_wo_discounts = [item[:5] for item in excel_data_list]
-    excel_data_list_wo_discounts.sort(key=lambda x: x[1])
+    for key, model in MODELS.items():
+        rows = [
+            dict(zip(COLUMNS[key], (item_id, *excel_data[key][item_id])))
+            for item_id in changes[key]['insert'] + changes[key]['update']
+        ]
+        if rows:
+            await _upsert(session, model, COLUMNS[key], rows)
 
-    if excel_data_list_wo_discounts == sql_data:
-        result = await different_between_discounts(excel_data_list)
-        return result
-    else:
-        if not excel_data_list_wo_discounts:
-            await create_tables()
-            await delete_cache()
-
-            async with redis as client:
-                cache = Cache()
-                await cache.add(client, 'excel', excel_data_list)
-            return 'Excel file is empty, database cleared'
-
-        excel_data_dict_wo_none = await _delete_none(excel_data_dict)
-
-        async with async_session() as session:
-            try:
-                await create_tables()
-                await delete_cache()
-                await session.execute(insert(Menu).values(excel_data_dict_wo_none['menus']))
-                await session.execute(insert(Submenu).values(excel_data_dict_wo_none['submenus']))
-                await session.execute(insert(Dish).values(excel_data_dict_wo_none['dishes']))
-            except IntegrityError:
-                await session.rollback()
-                raise HTTPException(
-                    status_code=409, detail='This title already exists'
+    await _delete(session, 'submenus', changes['submenus']['delete'])
+    await _delete(session, 'menus', changes['menus']['delete'])
+
+
+async def _delete(session: AsyncSession, key: str, item_ids: list[UUID]) -> None:
+    """Protected function for deleting rows from the table by IDs.
+
+    session: Database session.
+    key: Name of the table.
+    item_ids: IDs of rows to delete.
+    """
+    if item_ids:
+        model = MODELS[key]
+        await session.execute(delete(model).where(model.id.in_(item_ids)))
+
+
+async def _upsert(
+    session: AsyncSession, model: type[Menu | Submenu | Dish], columns: tuple[str, ...],
+    rows: list[dict[str, Any]]
+) -> None:
+    """Protected function for inserting rows to the table,
+    existing rows with the same ID are updated.
+    Large sets of rows are loaded with COPY through a staging table.
+
+    session: Database session.
+    model: Model of the table.
+    columns: Names of the table columns, ID is the first one.
+    rows: Rows values by columns names.
+    """
+    if len(rows) >= BULK_LOAD_THRESHOLD:
+        await _copy_upsert(session, model.__tablename__, columns, rows)
+        return
+
+    statement = insert(model.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=['id'],
+        set_={column: statement.excluded[column] for column in columns[1:]},
+    )
+    await session.execute(statement, rows)
+
+
+async def _copy_upsert(
+    session: AsyncSession, table: str, columns: tuple[str, ...], rows: list[dict[str, Any]]
+) -> None:
+    """Protected function for loading rows to a temporary staging table with COPY
+    and moving them to the table with one INSERT ... SELECT in the session transaction.
+
+    session: Database session.
+    table: Name of the table.
+    columns: Names of the table columns, ID is the first one.
+    rows: Rows values by columns names.
+    """
+    staging_table = f'{table}_staging'
+    columns_sql = ', '.join(columns)
+    connection = await session.connection()
+    await connection.exec_driver_sql(
+        f'CREATE TEMP TABLE {staging_table} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP'
+    )
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        staging_table, records=[tuple(row[column] for column in columns) for row in rows],
+        columns=columns,
+    )
+    set_sql = ', '.join(f'{column} = EXCLUDED.{column}' for column in columns[1:])
+    await connection.exec_driver_sql(
+        f'INSERT INTO {table} ({columns_sql}) SELECT {columns_sql} FROM {staging_table} '
+        f'ON CONFLICT (id) DO UPDATE SET {set_sql}'
+    )
+    await connection.exec_driver_sql(f'DROP TABLE {staging_table}')
+
+
+async def _reload_all(excel_data: CatalogData) -> None:
+    """Protected function for replacing all data in db with data from Excel file.
+    Data is loaded to shadow tables which are swapped with the live tables
+    in the same transaction, so readers see either old or new data
+    and writers are blocked only for the swap. Counters of the loaded
+    rows are computed in bulk, their triggers are created after the load.
+    Raises ExcelSyncError if the data violates db constraints, db is not changed then.
+
+    excel_data: Data from Excel file.
+    """
+    async with runtime.async_session() as session:
+        connection = await session.connection()
+        for key, model in MODELS.items():
+            await connection.exec_driver_sql(f'DROP TABLE IF EXISTS {key}_shadow CASCADE')
+            await connection.exec_driver_sql(f'CREATE TABLE {key}_shadow (LIKE {key} INCLUDING ALL)')
+            for foreign_key in model.__table__.foreign_keys:
+                await connection.exec_driver_sql(
+                    f'ALTER TABLE {key}_shadow ADD FOREIGN KEY ({foreign_key.parent.name}) '
+                    f'REFERENCES {foreign_key.column.table.name}_shadow ({foreign_key.column.name}) '
+                    f'ON DELETE {foreign_key.ondelete or "NO ACTION"}'
                 )
-            await session.commit()
 
-        async with redis as client:
-            cache = Cache()
-            await cache.add(client, 'excel', excel_data_list)
-        return 'Changes detected between excel file and database, database updated'
+        try:
+            for key in MODELS:
+                rows = [
+                    dict(zip(COLUMNS[key], (item_id, *values)))
+                    for item_id, values in excel_data[key].items()
+                ]
+                if rows:
+                    await _copy_upsert(session, f'{key}_shadow', COLUMNS[key], rows)
+        except IntegrityError as error:
+            await session.rollback()
+            raise ExcelSyncError(
+                f'Excel file can not be loaded to db, database not reloaded: {error.orig}'
+            ) from error
+
+        await reconcile_counters(connection, '_shadow')
+        for key in ('submenus', 'dishes'):
+            for statement in counter_triggers(key, '_shadow'):
+                await connection.exec_driver_sql(statement)
+
+        await connection.exec_driver_sql(
+            f'LOCK TABLE {", ".join(MODELS)} IN ACCESS EXCLUSIVE MODE'
+        )
+        await connection.exec_driver_sql(f'DROP TABLE {", ".join(reversed(MODELS))}')
+        for key in MODELS:
+            await connection.exec_driver_sql(f'ALTER TABLE {key}_shadow RENAME TO {key}')
+            await _rename_shadow_constraints(connection, key)
+        await session.commit()
 
 
-async def _delete_none(excel_data_dict: dict) -> dict[str, list]:
-    """Protected function for deleting None values from dictionary with Excel data
-    and returning it.
+async def _rename_shadow_constraints(connection: AsyncConnection, table: str) -> None:
+    """Protected function for renaming constraints and indexes
+    of the table that was a shadow table to their usual names.
+    Indexes of the model get their names from the model, their copies
+    are named by columns by postgres.
 
-    excel_data_dict: Dictionary with Excel data.
+    connection: Database connection.
+    table: Name of the table.
     """
-    excel_data_dict_wo_none: dict = {
-        'menus': [],
-        'submenus': [],
-        'dishes': [],
+    prefix = f'{table}_shadow'
+    model_indexes = {
+        f'{prefix}_{"_".join(column.name for column in index.columns)}_idx': index.name
+        for index in MODELS[table].__table__.indexes
     }
+    constraints = await connection.exec_driver_sql(
+        f"SELECT conname FROM pg_constraint WHERE conrelid = '{table}'::regclass"
+    )
+    for name in constraints.scalars().all():
+        if name.startswith(prefix):
+            await connection.exec_driver_sql(
+                f'ALTER TABLE {table} RENAME CONSTRAINT {name} TO {table}{name[len(prefix):]}'
+            )
+    indexes = await connection.exec_driver_sql(
+        f"SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = '{table}'"
+    )
+    for name in indexes.scalars().all():
+        if name in model_indexes:
+            await connection.exec_driver_sql(f'ALTER INDEX {name} RENAME TO {model_indexes[name]}')
+        elif name.startswith(prefix):
+            await connection.exec_driver_sql(
+                f'ALTER INDEX {name} RENAME TO {table}{name[len(prefix):]}'
+            )
 
-    for key, value in excel_data_dict.items():
-        for item in value:
-            item_list = list(item)
-
-            while None in item_list:
-                item_list.remove(None)
 
-            item_tuple = tuple(item_list)
-            excel_data_dict_wo_none[key].append(item_tuple)
+async def compare_data() -> str:
+    """Compares the data from the Excel file and the db and,
+    if the data differs, applies to the db only inserted, updated and deleted rows
+    in one transaction, clears cache of the changed menus and warms it up again.
+    If the changes can not be applied one by one (for example titles were swapped),
+    replaces all data in db by swapping in shadow tables.
+    """
+    db_data = await _get_data_from_db()
+    excel_data = await _read_excel_file(menu_excel_path)
+
+    changes = _get_changes(db_data, excel_data)
+    touched_menus = _get_touched_menus(changes, db_data, excel_data)
+    if not touched_menus:
+        return 'No changes found'
+
+    counts = ', '.join(
+        f'{key}: +{len(item_ids["insert"])} ~{len(item_ids["update"])} -{len(item_ids["delete"])}'
+        for key, item_ids in changes.items()
+    )
+    result = f'Changes detected between excel file and database, database updated ({counts})'
+    async with runtime.async_session() as session:
+        try:
+            await _apply_changes(session, changes, excel_data)
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            await _reload_all(excel_data)
+            result = 'Changes detected between excel file and database, database reloaded'
+
+    batch = Cache().batch(runtime.redis)
+    batch.delete('all')
+    for menu_id in touched_menus:
+        batch.delete_tree(str(menu_id))
+    batch.add('db_data', excel_data)
+    await batch.flush()
+    if CACHE_WARMUP:
+        await CacheWarmupService().warm_up(runtime.async_session, runtime.redis)
 
-    return excel_data_dict_wo_none
+    return result
@@ -0,0 +1,128 @@
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from src.config import EXCEL_SYNC_MODE, EXCEL_WATCHER_DEBOUNCE
+
+logger = logging.getLogger(__name__)
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class ExcelWatcher:
+    """A class for running a callback when the Excel file is written (Linux inotify).
+
+    The directory of the file is watched, so editors that save through a temporary
+    file and rename it are supported. Callback runs when no new events came for
+    the debounce window, events that come while the callback runs cause one more run.
+
+    Instance variable:
+        path: Excel file path.
+        callback: Coroutine function to run after the file is written.
+        debounce: Seconds without new events before running the callback.
+
+    Methods:
+        run: Watch the file until cancelled.
+    """
+
+    def __init__(
+        self, path: str, callback: Callable[[], Awaitable[Any]],
+        debounce: float = EXCEL_WATCHER_DEBOUNCE
+    ):
+        self.path = os.path.abspath(path)
+        self.callback = callback
+        self.debounce = debounce
+
+    async def run(self) -> None:
+        """Watch the file until cancelled."""
+        fd = _inotify_watch(os.path.dirname(self.path), IN_CLOSE_WRITE | IN_MOVED_TO)
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+        loop.add_reader(fd, self._read_events, fd, changed)
+        try:
+            while True:
+                await changed.wait()
+                while changed.is_set():
+                    changed.clear()
+                    try:
+                        await asyncio.wait_for(changed.wait(), self.debounce)
+                    except asyncio.TimeoutError:
+                        pass
+                try:
+                    logger.info(await self.callback())
+                except Exception:
+                    logger.exception('Excel file check failed')
+        finally:
+            loop.remove_reader(fd)
+            os.close(fd)
+
+    def _read_events(self, fd: int, changed: asyncio.Event) -> None:
+        """Protected method for reading inotify events and
+        setting the event if one of them is about the Excel file.
+
+        fd: Inotify file descriptor.
+        changed: Event to set.
+        """
+        file_name = os.path.basename(self.path).encode()
+        try:
+            buffer = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(buffer):
+            _, _, _, name_length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b'\0')
+            offset += name_length
+            if name == file_name:
+                changed.set()
+
+
+def _inotify_watch(directory: str, mask: int) -> int:
+    """Protected function for creating non-blocking inotify file descriptor
+    watching the directory and returning it.
+
+    directory: Directory to watch.
+    mask: Inotify events mask.
+    """
+    libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    if not hasattr(libc, 'inotify_init1'):
+        raise OSError('inotify is not available, use polling mode')
+    fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        errno = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(errno, f'inotify_add_watch failed for {directory}')
+    return fd
+
+
+async def dispatch_check() -> str:
+    """Send Excel file check to celery workers, so it runs with the worker
+    db settings and one at a time with the checks of celery beat."""
+    from src.task.tasks import create_task
+
+    result = await asyncio.to_thread(create_task.delay)
+    return f'Excel file check {result.id} sent to celery'
+
+
+async def main() -> None:
+    from src.task.config import menu_excel_path
+
+    await ExcelWatcher(menu_excel_path, dispatch_check).run()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    if EXCEL_SYNC_MODE == 'watcher':
+        asyncio.run(main())
+    else:
+        logger.info('EXCEL_SYNC_MODE is not "watcher", Excel file is checked by celery beat')
@@ -0,0 +1,146 @@
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.cache.metrics import Histogram
+from src.config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_STATEMENT_TIMEOUT,
+)
+
+CHECKOUT_WAIT_BOUNDS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+request_checkout_waits: ContextVar[list[float] | None] = ContextVar('request_checkout_waits', default=None)
+
+
+class CheckoutStats:
+    """A class for collecting waits for db connections of the process.
+
+    Instance variable:
+        checkout_wait: Histogram of seconds every checkout waited for a connection.
+        request_checkout_wait: Histogram of seconds every request waited for connections in total.
+
+    Methods:
+        snapshot: Get histograms.
+        reset: Delete all collected waits.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def snapshot(self) -> dict[str, dict]:
+        """Get histograms."""
+        return {
+            'checkout_wait_seconds': self.checkout_wait.snapshot(),
+            'request_checkout_wait_seconds': self.request_checkout_wait.snapshot(),
+        }
+
+    def reset(self) -> None:
+        """Delete all collected waits."""
+        self.checkout_wait = Histogram(CHECKOUT_WAIT_BOUNDS)
+        self.request_checkout_wait = Histogram(CHECKOUT_WAIT_BOUNDS)
+
+
+checkout_stats = CheckoutStats()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """A class of db connection pool measuring how long checkouts wait
+    for a free connection (or for a new one to connect).
+
+    Every wait is added to the checkout histogram and to the waits
+    of the current request, if it is measured by CheckoutTimingMiddleware.
+
+    Methods:
+        stats: Get pool usage and checkout waits.
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait = time.perf_counter() - start
+            checkout_stats.checkout_wait.observe(wait)
+            waits = request_checkout_waits.get()
+            if waits is not None:
+                waits.append(wait)
+
+    def stats(self) -> dict:
+        """Get pool usage: size, connections checked out, idle and over the size,
+        and checkout waits."""
+        return {
+            'size': self.size(),
+            'checked_out': self.checkedout(),
+            'idle': self.checkedin(),
+            'overflow': max(self.overflow(), 0),
+            **checkout_stats.snapshot(),
+        }
+
+
+def create_db_engine(database_url: str, statement_timeout: int = DB_STATEMENT_TIMEOUT) -> AsyncEngine:
+    """Function for creating async db engine with connection pool and statement
+    caching configured from environment.
+
+    Prepared statements are cached per connection by SQLAlchemy and asyncpg,
+    a cache size of 0 disables them (needed behind pgbouncer in transaction mode).
+
+    database_url: Database URL.
+    statement_timeout: Statement timeout of every connection in milliseconds, 0 disables it.
+    """
+    url = make_url(database_url).update_query_dict(
+        {'prepared_statement_cache_size': str(DB_STATEMENT_CACHE_SIZE)}
+    )
+    connect_args: dict = {'statement_cache_size': DB_STATEMENT_CACHE_SIZE}
+    if statement_timeout:
+        connect_args['server_settings'] = {'statement_timeout': str(statement_timeout)}
+    return create_async_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+class CheckoutTimingMiddleware:
+    """A class of ASGI middleware measuring how long every request waited for
+    db connections. The total wait is added to the request histogram and
+    returned in the Server-Timing header of requests that used the db.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        waits: list[float] = []
+        token = request_checkout_waits.set(waits)
+
+        async def send_with_timing(message: Message) -> None:
+            if message['type'] == 'http.response.start' and waits:
+                wait = sum(waits)
+                checkout_stats.request_checkout_wait.observe(wait)
+                MutableHeaders(scope=message).append('Server-Timing', f'db-checkout;dur={wait * 1000:.3f}')
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_checkout_waits.reset(token)
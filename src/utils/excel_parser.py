@@ -0,0 +1,148 @@
+from decimal import Decimal
+from itertools import islice
+from typing import NamedTuple
+from uuid import UUID
+
+import numpy as np
+from openpyxl import load_workbook
+
+COLUMNS = 7
+CHUNK_ROWS = 4096
+
+
+class MenuBatch(NamedTuple):
+    id: np.ndarray
+    title: np.ndarray
+    description: np.ndarray
+
+
+class SubmenuBatch(NamedTuple):
+    id: np.ndarray
+    title: np.ndarray
+    description: np.ndarray
+    menu_id: np.ndarray
+
+
+class DishBatch(NamedTuple):
+    id: np.ndarray
+    title: np.ndarray
+    description: np.ndarray
+    price: np.ndarray
+    submenu_id: np.ndarray
+    discount: np.ndarray
+
+
+class ExcelBatches(NamedTuple):
+    menus: MenuBatch
+    submenus: SubmenuBatch
+    dishes: DishBatch
+
+
+def read_excel_batches(path: str, chunk_rows: int = CHUNK_ROWS) -> ExcelBatches:
+    """Read Excel file in read-only mode and return columns of menus, submenus and dishes.
+
+    Row layout: a menu has its ID in the first column, a submenu in the second,
+    a dish in the third. Submenus and dishes belong to the nearest menu and
+    submenu above them. Rows without ID are skipped.
+
+    Rows are streamed from the sheet and classified in chunks of a fixed size
+    with masks, parent IDs are forward-filled from the row positions of the
+    nearest menu and submenu, IDs of the last ones are carried to the next
+    chunk. Only one chunk of raw cells is kept in memory. IDs are UUID object
+    arrays, price and discount are float arrays with NaN for a missing discount.
+
+    path: Excel file path.
+    chunk_rows: Number of rows classified at once.
+    """
+    chunks: list[ExcelBatches] = []
+    menu_id = submenu_id = None
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True, max_col=COLUMNS)
+        cells = np.full((chunk_rows, COLUMNS), None, dtype=object)
+        while True:
+            cells.fill(None)
+            count = 0
+            for count, row in enumerate(islice(rows, chunk_rows), 1):
+                cells[count - 1, :len(row)] = row
+            if not count:
+                break
+            chunk, menu_id, submenu_id = _classify_rows(cells[:count], menu_id, submenu_id)
+            chunks.append(chunk)
+    finally:
+        workbook.close()
+
+    if not chunks:
+        chunks.append(_classify_rows(cells[:0], None, None)[0])
+    return ExcelBatches(*(
+        batch_type(*map(np.concatenate, zip(*batches)))
+        for batch_type, batches in zip((MenuBatch, SubmenuBatch, DishBatch), zip(*chunks))
+    ))
+
+
+def to_decimals(values: np.ndarray) -> list[Decimal | None]:
+    """Function for converting float column to decimals rounded to cents,
+    NaN becomes None.
+
+    values: Float column from Excel batch.
+    """
+    return [None if value != value else round(Decimal(str(value)), 2) for value in values.tolist()]
+
+
+def _classify_rows(cells: np.ndarray, menu_id: UUID | None, submenu_id: UUID | None) -> tuple[
+    ExcelBatches, UUID | None, UUID | None
+]:
+    """Protected function for classifying a chunk of rows and returning its columns
+    with IDs of the last menu and submenu for the next chunk.
+
+    cells: Cells of the chunk rows.
+    menu_id: ID of the last menu of the previous chunks.
+    submenu_id: ID of the last submenu of the previous chunks.
+    """
+    present = np.not_equal(cells, None)
+    is_menu = present[:, 0]
+    is_submenu = ~is_menu & present[:, 1]
+    is_dish = ~is_menu & ~present[:, 1] & present[:, 2]
+
+    ids = np.full(len(cells), None, dtype=object)
+    ids[is_menu] = _to_uuid(cells[is_menu, 0])
+    ids[is_submenu] = _to_uuid(cells[is_submenu, 1])
+    ids[is_dish] = _to_uuid(cells[is_dish, 2])
+
+    menu_ids = _forward_fill(ids, is_menu, menu_id)
+    submenu_ids = _forward_fill(ids, is_submenu, submenu_id)
+
+    batches = ExcelBatches(
+        menus=MenuBatch(ids[is_menu], cells[is_menu, 1], cells[is_menu, 2]),
+        submenus=SubmenuBatch(
+            ids[is_submenu], cells[is_submenu, 2], cells[is_submenu, 3], menu_ids[is_submenu]
+        ),
+        dishes=DishBatch(
+            ids[is_dish],
+            cells[is_dish, 3],
+            cells[is_dish, 4],
+            cells[is_dish, 5].astype(np.float64),
+            submenu_ids[is_dish],
+            np.where(present[is_dish, 6], cells[is_dish, 6], np.nan).astype(np.float64),
+        ),
+    )
+    if len(cells):
+        menu_id, submenu_id = menu_ids[-1], submenu_ids[-1]
+    return batches, menu_id, submenu_id
+
+
+def _forward_fill(ids: np.ndarray, mask: np.ndarray, last: UUID | None) -> np.ndarray:
+    """Protected function for getting ID of the nearest masked row
+    at or above every row, the last ID of the previous chunks if there is no such row.
+
+    ids: IDs of all rows.
+    mask: Rows to take IDs from.
+    last: ID of the last masked row of the previous chunks.
+    """
+    positions = np.maximum.accumulate(np.where(mask, np.arange(len(ids)), -1))
+    filled = ids[positions]
+    filled[positions < 0] = last
+    return filled
+
+
+_to_uuid = np.frompyfunc(lambda value: UUID(str(value)), 1, 1)
@@ -0,0 +1,28 @@
+import hashlib
+import os
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_stat_key(path: str) -> tuple[int, int] | None:
+    """Return cheap file identity (mtime in ns, size) or None if file is missing.
+
+    path: File path.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_digest(path: str) -> str:
+    """Return hex digest of file content, reading the file in chunks.
+
+    path: File path.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -4,9 +4,14 @@ from typing import AsyncGenerator, Generator
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient
+from pytest_mock import MockerFixture
 from redis.asyncio import Redis
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from redis.asyncio.client import Pipeline
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from src.cache import redis_cache
+from src.cache.redis_cache import local_cache
+from src.cache.redis_pool import create_redis_pool
 from src.config import (
     TEST_DB_HOST,
     TEST_DB_NAME,
@@ -18,15 +23,16 @@ from src.config import (
 )
 from src.database import Base, get_async_session, get_redis_client
 from src.main import app
+from src.utils.db_pool import create_db_engine
 
 path = (
     f'postgresql+asyncpg://'
     f'{TEST_DB_USER}:{TEST_DB_PASS}@{TEST_DB_HOST}:{TEST_DB_PORT}/{TEST_DB_NAME}'
 )
 TEST_DATABASE_URL = path
-redis_test = Redis(host=TEST_REDIS_HOST, port=TEST_REDIS_PORT, db=0)
+redis_test = Redis(connection_pool=create_redis_pool(TEST_REDIS_HOST, TEST_REDIS_PORT))
 
-test_engine = create_async_engine(TEST_DATABASE_URL)
+test_engine = create_db_engine(TEST_DATABASE_URL)
 test_async_session = async_sessionmaker(test_engine)
 
 
@@ -36,8 +42,7 @@ async def override_get_async_session() -> AsyncGenerator[AsyncSession, None]:
 
 
 async def override_get_redis_client() -> AsyncGenerator[Redis, None]:
-    async with redis_test as client:
-        yield client
+    yield redis_test
 
 
 app.dependency_overrides[get_async_session] = override_get_async_session
@@ -51,6 +56,15 @@ def event_loop() -> Generator:
     loop.close()
 
 
+@pytest.fixture(scope='session', autouse=True)
+def strict_invalidation() -> Generator:
+    """Delete stale full menu on writes, so responses right after a write are fresh."""
+    strict = redis_cache.CACHE_STRICT_INVALIDATION
+    redis_cache.CACHE_STRICT_INVALIDATION = True
+    yield
+    redis_cache.CACHE_STRICT_INVALIDATION = strict
+
+
 @pytest_asyncio.fixture(scope='session')
 async def async_client() -> AsyncGenerator[AsyncClient, None]:
     async with AsyncClient(app=app, base_url=f'https://{TEST_DB_USER}/api/v1/') as ac:
@@ -59,14 +73,33 @@ async def async_client() -> AsyncGenerator[AsyncClient, None]:
 
 @pytest_asyncio.fixture(scope='module', autouse=True)
 async def prepare_tables() -> AsyncGenerator[AsyncClient, Redis]:
-    async with redis_test as redis:
-        await redis.flushdb()
+    await redis_test.flushdb()
+    local_cache.clear()
     async with test_engine.begin() as con:
         await con.run_sync(Base.metadata.drop_all)
         await con.run_sync(Base.metadata.create_all)
     yield
-    async with redis_test as redis:
-        await redis.flushdb()
+    await redis_test.flushdb()
+    local_cache.clear()
     async with test_engine.begin() as con:
         await con.run_sync(Base.metadata.drop_all)
         await con.run_sync(Base.metadata.create_all)
+
+
+@pytest.fixture
+def redis_round_trips(mocker: MockerFixture) -> dict[str, int]:
+    """Count round trips to redis: single commands and executed pipelines."""
+    counter = {'count': 0}
+    execute_command, execute = Redis.execute_command, Pipeline.execute
+
+    async def count_command(self: Redis, *args, **options):
+        counter['count'] += 1
+        return await execute_command(self, *args, **options)
+
+    async def count_pipeline(self: Pipeline, *args, **options):
+        counter['count'] += 1
+        return await execute(self, *args, **options)
+
+    mocker.patch.object(Redis, 'execute_command', count_command)
+    mocker.patch.object(Pipeline, 'execute', count_pipeline)
+    return counter
@@ -0,0 +1,77 @@
+import uuid
+
+from httpx import AsyncClient
+from pydantic import TypeAdapter
+
+from src.cache.metrics import CacheMetrics, Histogram, cache_metrics, key_family
+from src.cache.redis_cache import Cache
+from tests.conftest import redis_test
+
+MENU_ID, SUBMENU_ID, DISH_ID = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+
+def test_key_family():
+    assert key_family('all') == 'all'
+    assert key_family('full') == 'full'
+    assert key_family('db_data') == 'db_data'
+    assert key_family(f'{MENU_ID}') == 'menu'
+    assert key_family(f'{MENU_ID}_all') == 'submenus'
+    assert key_family(f'{MENU_ID}_{SUBMENU_ID}') == 'submenu'
+    assert key_family(f'{MENU_ID}_{SUBMENU_ID}_all') == 'dishes'
+    assert key_family(f'{MENU_ID}_{SUBMENU_ID}_{DISH_ID}') == 'dish'
+    assert key_family('excel_fingerprint') == 'other'
+
+
+def test_histogram_buckets():
+    histogram = Histogram((1, 10))
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+
+    assert histogram.snapshot() == {'bounds': [1, 10], 'counts': [2, 1, 1], 'count': 4, 'sum': 56.5}
+
+
+def test_metrics_hook():
+    metrics = CacheMetrics()
+    events = []
+
+    def failing_hook(name: str, family: str, value: float) -> None:
+        raise RuntimeError
+
+    metrics.add_hook(failing_hook)
+    metrics.add_hook(lambda name, family, value: events.append((name, family, value)))
+    metrics.count('hits', f'{MENU_ID}')
+    metrics.observe('payload_bytes', 'full', 100)
+
+    assert events == [('hits', 'menu', 1), ('payload_bytes', 'full', 100)]
+    assert metrics.snapshot()['menu']['hits'] == 1
+    assert metrics.snapshot()['full']['payload_bytes']['count'] == 1
+
+
+async def test_cache_metrics_by_family():
+    cache_metrics.reset()
+    cache = Cache(use_local=False)
+
+    async def build() -> list[str]:
+        return ['menu']
+
+    await cache.get_json_or_build(redis_test, 'all', build, TypeAdapter(list[str]))
+    await cache.get_json_or_build(redis_test, 'all', build, TypeAdapter(list[str]))
+    await cache.delete(redis_test, 'all')
+    stats = cache_metrics.snapshot()['all']
+
+    assert (stats['hits'], stats['misses'], stats['sets'], stats['invalidations']) == (1, 1, 1, 1)
+    assert stats['read_seconds']['count'] == 2
+    assert stats['build_seconds']['count'] == 1
+    assert stats['payload_bytes']['count'] == 2
+    assert stats['payload_bytes']['sum'] == 2 * len(b'["menu"]')
+
+
+async def test_get_cache_stats(async_client: AsyncClient):
+    cache_metrics.reset()
+    await async_client.get('menus')
+    await async_client.get('menus')
+    response = await async_client.get('stats/cache')
+
+    assert response.status_code == 200
+    assert response.json()['all']['hits'] + response.json()['all']['local_hits'] == 1
+    assert response.json()['all']['misses'] == 1
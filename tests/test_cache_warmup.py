@@ -0,0 +1,57 @@
+from httpx import AsyncClient
+from pytest_mock import MockerFixture
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache.redis_cache import VERSION_KEY, local_cache
+from src.service.cache_warmup_service import CacheWarmupService
+from tests import conftest
+from tests.conftest import redis_test
+
+
+async def create_catalog(async_client: AsyncClient) -> tuple[str, str]:
+    menu = await async_client.post('menus', json={'title': 'warm menu', 'description': 'description'})
+    menu_id = menu.json()['id']
+    submenu = await async_client.post(
+        f'menus/{menu_id}/submenus', json={'title': 'warm submenu', 'description': 'description'}
+    )
+    submenu_id = submenu.json()['id']
+    await async_client.post(
+        f'menus/{menu_id}/submenus/{submenu_id}/dishes',
+        json={'title': 'warm dish', 'description': 'description', 'price': '12.50'}
+    )
+    await redis_test.flushdb()
+    local_cache.clear()
+    return menu_id, submenu_id
+
+
+async def test_warm_up_writes_missing_hot_keys(async_client: AsyncClient):
+    menu_id, submenu_id = await create_catalog(async_client)
+
+    report = await CacheWarmupService().warm_up(conftest.test_async_session, redis_test)
+
+    keys = ['all', 'full', menu_id, f'{menu_id}_all', f'{menu_id}_{submenu_id}_all']
+    assert report.keys == len(keys)
+    assert report.seconds > 0
+    assert await redis_test.exists(*keys) == len(keys)
+    assert await redis_test.exists('full:fresh')
+    response = await async_client.get(f'menus/{menu_id}/submenus/{submenu_id}/dishes')
+    assert response.content == await redis_test.get(f'{menu_id}_{submenu_id}_all')
+
+    assert (await CacheWarmupService().warm_up(conftest.test_async_session, redis_test)).keys == 0
+    await async_client.delete(f'menus/{menu_id}')
+
+
+async def test_warm_up_discarded_after_invalidation(async_client: AsyncClient, mocker: MockerFixture):
+    menu_id, _ = await create_catalog(async_client)
+    service = CacheWarmupService()
+    get = service.full_menu_repository.get
+
+    async def get_invalidated(session: AsyncSession) -> list:
+        await redis_test.incr(VERSION_KEY)
+        return await get(session)
+
+    mocker.patch.object(service.full_menu_repository, 'get', get_invalidated)
+
+    assert (await service.warm_up(conftest.test_async_session, redis_test)).keys == 0
+    assert not await redis_test.exists('all', 'full', menu_id)
+    await async_client.delete(f'menus/{menu_id}')
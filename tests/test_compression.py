@@ -0,0 +1,68 @@
+import pickle
+
+import pytest
+from pydantic import TypeAdapter
+from pytest_mock import MockerFixture
+
+from src.cache import compression
+from src.cache.compression import CODECS, HEADERS, Compressor
+from src.cache.redis_cache import Cache
+from tests.conftest import redis_test
+
+LARGE = pickle.dumps({'dishes': [('dish title', 'dish description', '182.99')] * 1000})
+
+
+@pytest.mark.parametrize('codec', list(CODECS))
+def test_compressor_round_trip(codec: str):
+    compressor = Compressor(codec, min_size=1024)
+    data = compressor.encode(LARGE)
+
+    assert data[:1] == HEADERS[codec]
+    assert len(data) < len(LARGE)
+    assert compressor.decode(data) == LARGE
+
+
+def test_compressor_keeps_small_and_legacy_values():
+    compressor = Compressor('zlib', min_size=1024)
+
+    assert compressor.encode(b'[{"id": 1}]') == b'[{"id": 1}]'
+    assert compressor.decode(b'[{"id": 1}]') == b'[{"id": 1}]'
+    assert compressor.decode(pickle.dumps('value')) == pickle.dumps('value')
+    assert Compressor('none', min_size=0).encode(LARGE) == LARGE
+
+
+def test_compressor_auto_prefers_fast_codec(mocker: MockerFixture):
+    mocker.patch.dict(compression.CODECS, {'zlib': CODECS['zlib']}, clear=True)
+    assert Compressor('auto').codec == 'zlib'
+    with pytest.raises(ValueError):
+        Compressor('zstd')
+    with pytest.raises(ValueError):
+        Compressor('zlib').decode(HEADERS['zstd'] + b'data')
+
+
+async def test_cache_stores_large_values_compressed(mocker: MockerFixture):
+    mocker.patch.object(compression.compressor, 'min_size', 1024)
+    cache = Cache(use_local=False)
+    value = pickle.loads(LARGE)
+
+    await cache.add(redis_test, 'large_key', value)
+
+    stored = await redis_test.get('large_key')
+    assert stored[:1] in HEADERS.values()
+    assert len(stored) < len(LARGE)
+    assert await cache.get(redis_test, 'large_key') == value
+
+
+async def test_cached_json_body_decompressed(mocker: MockerFixture):
+    mocker.patch.object(compression.compressor, 'min_size', 16)
+    cache = Cache(use_local=False)
+    adapter = TypeAdapter(list[str])
+
+    async def build() -> list[str]:
+        return ['menu'] * 100
+
+    body = await cache.get_json_or_build(redis_test, 'large_json_key', build, adapter)
+
+    assert (await redis_test.get('large_json_key'))[:1] in HEADERS.values()
+    assert body == adapter.dump_json(['menu'] * 100)
+    assert await cache.get_json(redis_test, 'large_json_key') == body
@@ -0,0 +1,97 @@
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from src.counters import ReconcileReport, reconcile_counters
+from tests.conftest import test_engine
+
+
+async def get_counters() -> dict[str, list[tuple]]:
+    async with test_engine.connect() as conn:
+        menus = (await conn.execute(text('SELECT title, submenus_count, dishes_count FROM menus ORDER BY title'))).all()
+        submenus = (await conn.execute(text('SELECT title, dishes_count FROM submenus ORDER BY title'))).all()
+    return {'menus': [tuple(row) for row in menus], 'submenus': [tuple(row) for row in submenus]}
+
+
+async def create_catalog(async_client: AsyncClient) -> dict[str, str]:
+    ids = {}
+    for menu in ('menu1', 'menu2'):
+        response = await async_client.post('menus', json={'title': menu, 'description': 'description'})
+        ids[menu] = response.json()['id']
+    for submenu, menu in (('submenu1', 'menu1'), ('submenu2', 'menu1'), ('submenu3', 'menu2')):
+        response = await async_client.post(
+            f'menus/{ids[menu]}/submenus', json={'title': submenu, 'description': 'description'}
+        )
+        ids[submenu] = response.json()['id']
+    for dish, menu, submenu in (
+        ('dish1', 'menu1', 'submenu1'), ('dish2', 'menu1', 'submenu1'), ('dish3', 'menu1', 'submenu2')
+    ):
+        response = await async_client.post(
+            f'menus/{ids[menu]}/submenus/{ids[submenu]}/dishes',
+            json={'title': dish, 'description': 'description', 'price': '10.50'}
+        )
+        ids[dish] = response.json()['id']
+    return ids
+
+
+async def test_counters_follow_writes(async_client: AsyncClient):
+    ids = await create_catalog(async_client)
+    assert await get_counters() == {
+        'menus': [('menu1', 2, 3), ('menu2', 1, 0)],
+        'submenus': [('submenu1', 2), ('submenu2', 1), ('submenu3', 0)],
+    }
+
+    async with test_engine.begin() as conn:
+        await conn.execute(text('UPDATE dishes SET submenu_id = :submenu_id'), {'submenu_id': ids['submenu3']})
+    assert await get_counters() == {
+        'menus': [('menu1', 2, 0), ('menu2', 1, 3)],
+        'submenus': [('submenu1', 0), ('submenu2', 0), ('submenu3', 3)],
+    }
+
+    async with test_engine.begin() as conn:
+        await conn.execute(text('UPDATE submenus SET menu_id = :menu_id'), {'menu_id': ids['menu1']})
+    assert await get_counters() == {
+        'menus': [('menu1', 3, 3), ('menu2', 0, 0)],
+        'submenus': [('submenu1', 0), ('submenu2', 0), ('submenu3', 3)],
+    }
+
+    await async_client.delete(f'menus/{ids["menu1"]}/submenus/{ids["submenu3"]}')
+    assert await get_counters() == {
+        'menus': [('menu1', 2, 0), ('menu2', 0, 0)],
+        'submenus': [('submenu1', 0), ('submenu2', 0)],
+    }
+
+    await async_client.delete(f'menus/{ids["menu1"]}')
+    assert await get_counters() == {'menus': [('menu2', 0, 0)], 'submenus': []}
+    await async_client.delete(f'menus/{ids["menu2"]}')
+
+
+async def test_menus_are_read_from_counters(async_client: AsyncClient):
+    ids = await create_catalog(async_client)
+
+    response = await async_client.get(f'menus/{ids["menu1"]}')
+    assert (response.json()['submenus_count'], response.json()['dishes_count']) == (2, 3)
+    response = await async_client.get(f'menus/{ids["menu1"]}/submenus/{ids["submenu1"]}')
+    assert response.json()['dishes_count'] == 2
+
+    for menu in ('menu1', 'menu2'):
+        await async_client.delete(f'menus/{ids[menu]}')
+
+
+async def test_reconcile_counters(async_client: AsyncClient):
+    ids = await create_catalog(async_client)
+    async with test_engine.begin() as conn:
+        await conn.execute(text("SET LOCAL session_replication_role = 'replica'"))
+        await conn.execute(text('DELETE FROM dishes'))
+        await conn.execute(text('UPDATE menus SET submenus_count = 7'))
+
+    async with test_engine.begin() as conn:
+        assert await reconcile_counters(conn) == ReconcileReport(submenus=2, menus=2)
+    assert await get_counters() == {
+        'menus': [('menu1', 2, 0), ('menu2', 1, 0)],
+        'submenus': [('submenu1', 0), ('submenu2', 0), ('submenu3', 0)],
+    }
+    async with test_engine.begin() as conn:
+        assert await reconcile_counters(conn) == ReconcileReport(submenus=0, menus=0)
+
+    for menu in ('menu1', 'menu2'):
+        await async_client.delete(f'menus/{ids[menu]}')
@@ -0,0 +1,46 @@
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from src.config import (
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_TIMEOUT,
+)
+from src.utils.db_pool import TimedQueuePool, checkout_stats
+from tests.conftest import test_engine
+
+
+async def test_engine_is_configured():
+    pool = test_engine.pool
+    assert isinstance(pool, TimedQueuePool)
+    assert pool.size() == DB_POOL_SIZE
+    assert pool._timeout == DB_POOL_TIMEOUT
+    assert pool._recycle == DB_POOL_RECYCLE
+    assert pool._pre_ping
+
+    async with test_engine.connect() as conn:
+        timeout = (await conn.execute(text('SHOW statement_timeout'))).scalar_one()
+    assert timeout == f'{DB_STATEMENT_TIMEOUT}ms' or timeout == f'{DB_STATEMENT_TIMEOUT // 1000}s'
+
+
+async def test_checkout_wait_is_measured(async_client: AsyncClient):
+    checkout_stats.reset()
+
+    response = await async_client.post('menus', json={'title': 'menu', 'description': 'menu description'})
+    assert response.status_code == 201
+    assert response.headers['Server-Timing'].startswith('db-checkout;dur=')
+    assert checkout_stats.checkout_wait.count >= 1
+    assert checkout_stats.request_checkout_wait.count == 1
+
+    response = await async_client.get('stats/cache')
+    assert 'Server-Timing' not in response.headers
+    assert checkout_stats.request_checkout_wait.count == 1
+
+
+async def test_get_db_pool_stats(async_client: AsyncClient):
+    response = await async_client.get('stats/db_pool')
+
+    assert response.status_code == 200
+    assert response.json()['size'] == DB_POOL_SIZE
+    assert set(response.json()['checkout_wait_seconds']) == {'bounds', 'counts', 'count', 'sum'}
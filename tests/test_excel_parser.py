@@ -0,0 +1,53 @@
+from decimal import Decimal
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+from openpyxl import Workbook
+
+from src.utils.excel_parser import read_excel_batches, to_decimals
+
+menu1_id = '08f8c612-2700-406e-88df-eae964a98f67'
+menu2_id = '7cbb7091-747e-4d5c-82e5-d7da589888e9'
+submenu1_id = 'c2ddea44-b60b-49ad-b919-7e40ecddcdb9'
+submenu2_id = '2cc28716-4861-4ca0-b78e-aa9194c28e1f'
+dish1_id = '2f14b53d-1bcc-4a1b-97ca-d08cfedbc31c'
+dish2_id = '5b0a804a-d0c0-45c7-9ef0-bf5a5bba271a'
+dish3_id = '29a5e408-08c7-4f66-9432-972dd4d644b3'
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 3, 4096])
+def test_read_excel_batches(tmp_path: Path, chunk_rows: int):
+    path = tmp_path / 'Menu.xlsx'
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append([menu1_id, 'menu1', 'menu desc1'])
+    sheet.append([None, submenu1_id, 'submenu1', None])
+    sheet.append([None, None, dish1_id, 'dish1', 'dish desc1', 182.99, 80])
+    sheet.append([None, None, dish2_id, 'dish2', None, 10])
+    sheet.append([])
+    sheet.append([menu2_id, 'menu2', None])
+    sheet.append([None, submenu2_id, 'submenu2', 'submenu desc2'])
+    sheet.append([None, None, dish3_id, 'dish3', 'dish desc3', 2700.785, 12.5])
+    workbook.save(path)
+
+    menus, submenus, dishes = read_excel_batches(str(path), chunk_rows)
+
+    assert menus.id.tolist() == [UUID(menu1_id), UUID(menu2_id)]
+    assert menus.description.tolist() == ['menu desc1', None]
+    assert submenus.title.tolist() == ['submenu1', 'submenu2']
+    assert submenus.menu_id.tolist() == [UUID(menu1_id), UUID(menu2_id)]
+    assert dishes.id.tolist() == [UUID(dish1_id), UUID(dish2_id), UUID(dish3_id)]
+    assert dishes.description.tolist() == ['dish desc1', None, 'dish desc3']
+    assert dishes.submenu_id.tolist() == [UUID(submenu1_id), UUID(submenu1_id), UUID(submenu2_id)]
+    assert to_decimals(dishes.price) == [Decimal('182.99'), Decimal('10.00'), Decimal('2700.78')]
+    assert to_decimals(dishes.discount) == [Decimal('80.00'), None, Decimal('12.50')]
+
+
+def test_read_excel_batches_empty_sheet(tmp_path: Path):
+    path = tmp_path / 'Menu.xlsx'
+    Workbook().save(path)
+
+    menus, submenus, dishes = read_excel_batches(str(path))
+
+    assert len(menus.id) == len(submenus.id) == len(dishes.id) == 0
@@ -0,0 +1,377 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from collections.abc import Coroutine
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, AsyncGenerator
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from openpyxl import Workbook
+from pytest_mock import MockerFixture
+from sqlalchemy import select, text
+
+from src import database
+from src.config import TEST_REDIS_HOST, TEST_REDIS_PORT
+from src.models import Menu
+from src.task import tasks
+from src.task.runtime import WorkerRuntime, runtime
+from src.task.watcher import ExcelWatcher, dispatch_check
+from tests import conftest
+
+data: dict[str, Any] = {
+    'menu1': '08f8c612-2700-406e-88df-eae964a98f67',
+    'menu2': '7cbb7091-747e-4d5c-82e5-d7da589888e9',
+    'submenu1': 'c2ddea44-b60b-49ad-b919-7e40ecddcdb9',
+    'submenu2': '2cc28716-4861-4ca0-b78e-aa9194c28e1f',
+    'dish1': '2f14b53d-1bcc-4a1b-97ca-d08cfedbc31c',
+    'dish2': '5b0a804a-d0c0-45c7-9ef0-bf5a5bba271a',
+    'dish3': '29a5e408-08c7-4f66-9432-972dd4d644b3',
+}
+
+
+def write_workbook(path: Path, rows: list[list[Any]]) -> None:
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(path)
+
+
+def catalog(dish1_price: float = 182.99, dish1_discount: float | None = None) -> list[list[Any]]:
+    return [
+        [data['menu1'], 'menu1', 'menu desc1'],
+        [None, data['submenu1'], 'submenu1', 'submenu desc1'],
+        [None, None, data['dish1'], 'dish1', 'dish desc1', dish1_price, dish1_discount],
+        [None, None, data['dish2'], 'dish2', 'dish desc2', 215.36, 10],
+        [data['menu2'], 'menu2', 'menu desc2'],
+        [None, data['submenu2'], 'submenu2', 'submenu desc2'],
+        [None, None, data['dish3'], 'dish3', 'dish desc3', 2700.79, None],
+    ]
+
+
+@pytest_asyncio.fixture
+async def excel_path(tmp_path: Path, mocker: MockerFixture) -> AsyncGenerator[Path, None]:
+    path = tmp_path / 'Menu.xlsx'
+    mocker.patch.object(tasks, 'menu_excel_path', str(path))
+    mocker.patch.object(runtime, 'engine', conftest.test_engine)
+    mocker.patch.object(runtime, 'async_session', conftest.test_async_session)
+    mocker.patch.object(runtime, 'redis', conftest.redis_test)
+    yield path
+
+
+async def test_sync_initial_load(async_client: AsyncClient, excel_path: Path):
+    write_workbook(excel_path, catalog())
+
+    result = await tasks.compare_data()
+
+    assert result.startswith('Changes detected')
+    response = await async_client.get('/menus')
+    assert response.status_code == 200
+    assert [(menu['title'], menu['submenus_count'], menu['dishes_count']) for menu in response.json()] == [
+        ('menu1', 1, 2), ('menu2', 1, 1)
+    ]
+
+
+async def test_sync_no_changes(excel_path: Path):
+    write_workbook(excel_path, catalog())
+
+    assert await tasks.compare_data() == 'No changes found'
+
+
+async def test_sync_changes_only_touched_menu(async_client: AsyncClient, excel_path: Path):
+    await async_client.get(f"/menus/{data['menu1']}")
+    await async_client.get(f"/menus/{data['menu2']}")
+    write_workbook(excel_path, catalog(dish1_price=100, dish1_discount=25))
+
+    result = await tasks.compare_data()
+
+    assert result.endswith('(menus: +0 ~0 -0, submenus: +0 ~0 -0, dishes: +0 ~1 -0)')
+    assert await conftest.redis_test.exists(data['menu2'])
+    # invalidated keys of the touched menu are warmed up again with new data
+    dishes = json.loads(await conftest.redis_test.get(f"{data['menu1']}_{data['submenu1']}_all"))
+    assert {dish['id']: dish['price'] for dish in dishes}[data['dish1']] == '75.00'
+    response = await async_client.get(
+        f"/menus/{data['menu1']}/submenus/{data['submenu1']}/dishes/{data['dish1']}"
+    )
+    assert response.json()['price'] == '75.00'
+
+
+async def test_sync_moves_submenu_out_of_deleted_menu(async_client: AsyncClient, excel_path: Path):
+    rows = catalog(dish1_price=100, dish1_discount=25)
+    write_workbook(excel_path, rows[4:] + rows[1:4])
+
+    result = await tasks.compare_data()
+
+    assert result.endswith('(menus: +0 ~0 -1, submenus: +0 ~1 -0, dishes: +0 ~0 -0)')
+    response = await async_client.get(f"/menus/{data['menu2']}")
+    assert response.json()['submenus_count'] == 2
+    assert response.json()['dishes_count'] == 3
+
+
+async def test_sync_swapped_titles_reload(async_client: AsyncClient, excel_path: Path):
+    rows = catalog(dish1_price=100, dish1_discount=25)
+    rows[2][3], rows[3][3] = rows[3][3], rows[2][3]
+    write_workbook(excel_path, rows)
+
+    result = await tasks.compare_data()
+
+    assert result == 'Changes detected between excel file and database, database reloaded'
+    response = await async_client.get(
+        f"/menus/{data['menu1']}/submenus/{data['submenu1']}/dishes/{data['dish1']}"
+    )
+    assert response.json()['title'] == 'dish2'
+
+
+async def test_check_excel_skips_unchanged_file(excel_path: Path):
+    write_workbook(excel_path, catalog(dish1_price=100, dish1_discount=25))
+    await tasks.check_excel()
+    stats = await tasks.get_sync_stats()
+
+    assert await tasks.check_excel() == 'Excel file not changed, comparison skipped'
+
+    stat = os.stat(excel_path)
+    os.utime(excel_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert await tasks.check_excel() == 'Excel file not changed, comparison skipped'
+    assert (await tasks.get_sync_stats())['skipped'] == stats['skipped'] + 2
+
+
+async def test_get_excel_sync_stats(async_client: AsyncClient, excel_path: Path, mocker: MockerFixture):
+    mocker.patch.object(database, 'redis', conftest.redis_test)
+    write_workbook(excel_path, catalog(dish1_price=100, dish1_discount=25))
+    await tasks.check_excel()
+    stats = await tasks.get_sync_stats()
+    await conftest.redis_test.set('menus', 'cached')
+
+    await database.delete_cache(keep=tasks.SYNC_STATE_KEYS)
+
+    assert not await conftest.redis_test.exists('menus')
+    assert await conftest.redis_test.exists(tasks.FINGERPRINT_KEY)
+    response = await async_client.get('stats/excel_sync')
+    assert response.status_code == 200
+    assert response.json() == stats
+
+
+async def test_check_excel_compares_changed_file(excel_path: Path):
+    write_workbook(excel_path, catalog(dish1_price=120, dish1_discount=25))
+    stats = await tasks.get_sync_stats()
+
+    assert (await tasks.check_excel()).endswith('dishes: +0 ~1 -0)')
+    assert (await tasks.get_sync_stats())['applied'] == stats['applied'] + 1
+
+
+async def test_check_excel_hashes_changed_file_once(excel_path: Path, mocker: MockerFixture):
+    write_workbook(excel_path, catalog(dish1_price=125, dish1_discount=25))
+    await tasks.check_excel()
+    write_workbook(excel_path, catalog(dish1_price=126, dish1_discount=25))
+    spy = mocker.spy(tasks, 'file_digest')
+
+    assert (await tasks.check_excel()).endswith('dishes: +0 ~1 -0)')
+    assert spy.call_count == 1
+
+
+async def test_check_excel_runs_one_at_a_time(excel_path: Path):
+    write_workbook(excel_path, catalog(dish1_price=130, dish1_discount=25))
+
+    applied, skipped = sorted(
+        await asyncio.gather(tasks.check_excel(), tasks.check_excel()), key=lambda result: 'skipped' in result
+    )
+
+    assert applied.endswith('dishes: +0 ~1 -0)')
+    assert skipped == 'Excel file not changed, comparison skipped'
+
+
+async def test_check_excel_lock_not_held_in_transaction(excel_path: Path, mocker: MockerFixture):
+    write_workbook(excel_path, catalog(dish1_price=135, dish1_discount=25))
+    states = []
+    check_excel = tasks._check_excel
+
+    async def check_excel_and_read_lock_state() -> str:
+        async with conftest.test_async_session() as session:
+            response = await session.execute(text(
+                "SELECT a.state FROM pg_locks l JOIN pg_stat_activity a ON a.pid = l.pid "
+                "WHERE l.locktype = 'advisory' AND l.objid = :lock_id AND l.granted"
+            ), {'lock_id': tasks.EXCEL_SYNC_LOCK_ID})
+            states.extend(response.scalars().all())
+        return await check_excel()
+
+    mocker.patch.object(tasks, '_check_excel', check_excel_and_read_lock_state)
+
+    assert (await tasks.check_excel()).endswith('dishes: +0 ~1 -0)')
+    assert states == ['idle']
+
+
+async def test_watcher_dispatches_check_to_celery(mocker: MockerFixture):
+    delay = mocker.patch.object(tasks.create_task, 'delay', return_value=mocker.Mock(id='task-id'))
+
+    assert await dispatch_check() == 'Excel file check task-id sent to celery'
+    delay.assert_called_once_with()
+
+
+async def test_check_excel_compares_after_db_change(excel_path: Path):
+    write_workbook(excel_path, catalog(dish1_price=120, dish1_discount=25))
+    await tasks.check_excel()
+    await conftest.redis_test.delete('db_data')
+    stats = await tasks.get_sync_stats()
+
+    assert await tasks.check_excel() == 'No changes found'
+    assert (await tasks.get_sync_stats())['unchanged'] == stats['unchanged'] + 1
+
+
+@pytest.mark.skipif(sys.platform != 'linux', reason='inotify is available only on Linux')
+async def test_watcher_latency_from_save_to_api(
+    async_client: AsyncClient, excel_path: Path, mocker: MockerFixture
+):
+    loop = asyncio.get_running_loop()
+
+    def run_in_test_loop(coroutine: Coroutine[Any, Any, Any]) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    # the task runs eagerly in the dispatching thread, its coroutine in the test loop
+    mocker.patch.object(runtime, 'run', run_in_test_loop)
+    delay = mocker.patch.object(
+        tasks.create_task, 'delay', side_effect=lambda: mocker.Mock(id='task-id', result=tasks.create_task())
+    )
+    debounce = 0.2
+    watcher = asyncio.create_task(ExcelWatcher(str(excel_path), dispatch_check, debounce).run())
+    await asyncio.sleep(0.1)
+    rows = catalog(dish1_price=120, dish1_discount=25)
+    rows[0][1] = 'watched menu1'
+
+    try:
+        start = time.perf_counter()
+        write_workbook(excel_path, rows)
+        while (await async_client.get(f"/menus/{data['menu1']}")).json().get('title') != 'watched menu1':
+            assert time.perf_counter() - start < debounce + 10
+            await asyncio.sleep(0.02)
+    finally:
+        watcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await watcher
+
+    # one save is debounced into one check sent to celery
+    delay.assert_called_once_with()
+
+
+async def test_sync_bulk_load(async_client: AsyncClient, excel_path: Path, mocker: MockerFixture):
+    mocker.patch.object(tasks, 'BULK_LOAD_THRESHOLD', 1)
+    rows = catalog(dish1_price=50, dish1_discount=10)
+    rows.append([None, None, '9821f28c-04d5-4aed-b1f1-051d8af38f70', 'dish4', None, 5.5, None])
+    write_workbook(excel_path, rows)
+
+    result = await tasks.compare_data()
+
+    assert result.endswith('dishes: +1 ~1 -0)')
+    response = await async_client.get(f"/menus/{data['menu2']}/submenus/{data['submenu2']}/dishes")
+    assert [(dish['title'], dish['price']) for dish in response.json()] == [
+        ('dish3', '2700.79'), ('dish4', '5.50')
+    ]
+    response = await async_client.get(
+        f"/menus/{data['menu1']}/submenus/{data['submenu1']}/dishes/{data['dish1']}"
+    )
+    assert response.json()['price'] == '45.00'
+
+
+async def test_reload_keeps_constraints(async_client: AsyncClient, excel_path: Path):
+    write_workbook(excel_path, catalog())
+    await tasks._reload_all(await tasks._read_excel_file(str(excel_path)))
+    await tasks._reload_all(await tasks._read_excel_file(str(excel_path)))
+
+    async with conftest.test_async_session() as session:
+        response = await session.execute(text(
+            "SELECT conname FROM pg_constraint WHERE conrelid = 'submenus'::regclass ORDER BY conname"
+        ))
+    assert response.scalars().all() == ['submenus_menu_id_fkey', 'submenus_pkey', 'submenus_title_key']
+
+    async with conftest.test_async_session() as session:
+        response = await session.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE tablename IN ('submenus', 'dishes') ORDER BY indexname"
+        ))
+    assert response.scalars().all() == [
+        'dishes_pkey', 'dishes_title_key', 'ix_dishes_submenu_id',
+        'ix_submenus_menu_id', 'submenus_pkey', 'submenus_title_key',
+    ]
+
+    response = await async_client.post('/menus', json={'title': 'menu1', 'description': 'menu desc1'})
+    assert response.status_code == 409
+
+
+async def test_reload_rejects_duplicate_titles(excel_path: Path):
+    rows = catalog()
+    rows[3][3] = rows[2][3]
+    write_workbook(excel_path, rows)
+
+    with pytest.raises(tasks.ExcelSyncError, match='database not reloaded'):
+        await tasks._reload_all(await tasks._read_excel_file(str(excel_path)))
+
+    async with conftest.test_async_session() as session:
+        response = await session.execute(select(Menu.title).where(Menu.id == data['menu1']))
+    assert response.scalar_one() == 'menu1'
+
+
+async def test_reload_keeps_counters(excel_path: Path):
+    write_workbook(excel_path, catalog())
+    await tasks._reload_all(await tasks._read_excel_file(str(excel_path)))
+
+    async with conftest.test_async_session() as session:
+        response = await session.execute(text('SELECT title, submenus_count, dishes_count FROM menus ORDER BY title'))
+        assert [tuple(row) for row in response.all()] == [('menu1', 1, 2), ('menu2', 1, 1)]
+
+        await session.execute(text('DELETE FROM dishes WHERE id = :id'), {'id': data['dish1']})
+        await session.commit()
+        response = await session.execute(text('SELECT dishes_count FROM menus WHERE id = :id'), {'id': data['menu1']})
+    assert response.scalar_one() == 1
+
+
+async def test_reload_readers_see_old_data(excel_path: Path, mocker: MockerFixture):
+    rows = catalog()
+    rows[0][1] = 'reloaded menu1'
+    write_workbook(excel_path, rows)
+    titles_during_reload = []
+    copy_upsert = tasks._copy_upsert
+
+    async def copy_upsert_and_read(*args: Any) -> None:
+        await copy_upsert(*args)
+        async with conftest.test_async_session() as session:
+            response = await session.execute(select(Menu.title).where(Menu.id == data['menu1']))
+            titles_during_reload.append(response.scalar_one())
+
+    mocker.patch.object(tasks, '_copy_upsert', copy_upsert_and_read)
+    await tasks._reload_all(await tasks._read_excel_file(str(excel_path)))
+
+    assert titles_during_reload == ['menu1', 'menu1', 'menu1']
+    async with conftest.test_async_session() as session:
+        response = await session.execute(select(Menu.title).where(Menu.id == data['menu1']))
+    assert response.scalar_one() == 'reloaded menu1'
+
+
+def test_worker_runtime_reuses_loop_and_pools():
+    worker_runtime = WorkerRuntime()
+    worker_runtime.start(conftest.TEST_DATABASE_URL, TEST_REDIS_HOST, TEST_REDIS_PORT)
+
+    async def connection_ids() -> tuple[int, int]:
+        async with worker_runtime.async_session() as session:
+            backend_pid = (await session.execute(text('SELECT pg_backend_pid()'))).scalar_one()
+        await worker_runtime.redis.ping()
+        return backend_pid, id(asyncio.get_running_loop())
+
+    async def statement_timeout() -> str:
+        async with worker_runtime.async_session() as session:
+            return (await session.execute(text('SHOW statement_timeout'))).scalar_one()
+
+    try:
+        first = worker_runtime.run(connection_ids())
+        second = worker_runtime.run(connection_ids())
+        assert first == second
+        assert first[1] == id(worker_runtime.loop)
+        assert worker_runtime.run(statement_timeout()) == '0'
+    finally:
+        worker_runtime.stop()
+        asyncio.set_event_loop(None)
+
+    assert worker_runtime.loop is None
+    assert worker_runtime.redis is runtime.redis
@@ -1,8 +1,11 @@
+import json
 from typing import Any
 
 from httpx import AsyncClient
 from pytest_mock import MockerFixture
 
+from src.service.full_menu_service import full_menu_adapter
+
 data: dict[str, Any] = {
     'menu1': {
         'id': '4219b783-b3ac-49da-9095-8d19e150a065',
@@ -257,3 +260,12 @@ async def test_get_with_many_items(async_client: AsyncClient, mocker: MockerFixt
     assert dish3['title'] == data['dish3']['title']
     assert dish3['description'] == data['dish3']['description']
     assert dish3['price'] == data['dish3']['response_price']
+
+
+async def test_get_matches_response_model(async_client: AsyncClient):
+    response = await async_client.get(f'{path}')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/json'
+    full_menu = full_menu_adapter.validate_json(response.content)
+    assert json.loads(full_menu_adapter.dump_json(full_menu)) == response.json()
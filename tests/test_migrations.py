@@ -0,0 +1,122 @@
+import asyncio
+from collections.abc import AsyncGenerator
+
+import pytest_asyncio
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.database import Base
+from src.migrations import (
+    MIGRATION_LOCK_ID,
+    MIGRATIONS,
+    SCHEMA_VERSION,
+    get_schema_version,
+    migrate,
+)
+from src.models import Dish, Menu
+from src.utils.db_pool import create_db_engine
+from tests.conftest import TEST_DATABASE_URL, test_engine
+
+BASELINE_SCHEMA = (
+    """CREATE TABLE menus (
+        id UUID NOT NULL, title VARCHAR(80), description TEXT NOT NULL,
+        PRIMARY KEY (id), UNIQUE (title)
+    )""",
+    """CREATE TABLE submenus (
+        id UUID NOT NULL, title VARCHAR(80), description TEXT NOT NULL, menu_id UUID NOT NULL,
+        PRIMARY KEY (id), UNIQUE (title), FOREIGN KEY (menu_id) REFERENCES menus (id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE dishes (
+        id UUID NOT NULL, title VARCHAR(80), description TEXT NOT NULL, price DECIMAL(10, 2) NOT NULL,
+        submenu_id UUID NOT NULL,
+        PRIMARY KEY (id), UNIQUE (title), FOREIGN KEY (submenu_id) REFERENCES submenus (id) ON DELETE CASCADE
+    )""",
+)
+
+
+async def get_schema(engine: AsyncEngine) -> tuple[set[tuple[str, str, str]], set[str]]:
+    async with engine.connect() as conn:
+        columns = (await conn.execute(text(
+            """SELECT table_name, column_name, is_nullable FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name != 'schema_version'"""
+        ))).all()
+        indexes = (await conn.scalars(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = 'public' AND indexname LIKE 'ix_%'"
+        ))).all()
+    return {tuple(column) for column in columns}, set(indexes)
+
+
+def get_models_schema() -> tuple[set[tuple[str, str, str]], set[str]]:
+    tables = Base.metadata.sorted_tables
+    return (
+        {(table.name, column.name, 'YES' if column.nullable else 'NO') for table in tables for column in table.columns},
+        {index.name for table in tables for index in table.indexes},
+    )
+
+
+@pytest_asyncio.fixture
+async def empty_db() -> AsyncGenerator[None, None]:
+    async with test_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.execute(text('DROP TABLE IF EXISTS schema_version'))
+    yield
+    async with test_engine.begin() as conn:
+        await conn.execute(text('DROP TABLE IF EXISTS schema_version'))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def test_migrate_creates_schema_of_models(empty_db: None):
+    assert await migrate(test_engine) == SCHEMA_VERSION
+
+    async with test_engine.connect() as conn:
+        versions = (await conn.scalars(text('SELECT version FROM schema_version ORDER BY version'))).all()
+    assert await get_schema(test_engine) == get_models_schema()
+    assert versions == [migration.version for migration in MIGRATIONS]
+
+
+async def test_migrate_keeps_data(empty_db: None):
+    await migrate(test_engine)
+    async with test_engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO menus (id, title, description) VALUES (gen_random_uuid(), 'menu', 'description')"
+        ))
+
+    assert await migrate(test_engine) == SCHEMA_VERSION
+    async with test_engine.connect() as conn:
+        assert await conn.scalar(text('SELECT count(*) FROM menus')) == 1
+        assert await conn.scalar(text('SELECT count(*) FROM schema_version')) == len(MIGRATIONS)
+
+
+async def test_migrate_adopts_unversioned_schema(empty_db: None):
+    async with test_engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            await conn.execute(text(statement))
+        await conn.execute(text(
+            "INSERT INTO menus (id, title, description) VALUES (gen_random_uuid(), 'menu', 'description')"
+        ))
+        assert await get_schema_version(conn) == 0
+
+    assert await migrate(test_engine) == SCHEMA_VERSION
+    async with test_engine.connect() as conn:
+        assert await get_schema_version(conn) == SCHEMA_VERSION
+        assert await conn.scalar(select(Menu.submenus_count)) == 0
+        assert (await conn.execute(select(Dish.discounted_price))).all() == []
+    assert await get_schema(test_engine) == get_models_schema()
+
+
+async def test_migrate_waits_for_lock_longer_than_statement_timeout(empty_db: None):
+    engine = create_db_engine(TEST_DATABASE_URL, statement_timeout=100)
+
+    async def hold_lock() -> None:
+        async with test_engine.begin() as conn:
+            await conn.execute(text('SELECT pg_advisory_xact_lock(:lock_id)'), {'lock_id': MIGRATION_LOCK_ID})
+            await asyncio.sleep(0.5)
+
+    holder = asyncio.create_task(hold_lock())
+    await asyncio.sleep(0.1)
+    try:
+        assert await migrate(engine) == SCHEMA_VERSION
+    finally:
+        await holder
+        await engine.dispose()
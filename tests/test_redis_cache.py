@@ -0,0 +1,306 @@
+import asyncio
+import json
+import pickle
+import time
+import uuid
+from typing import Any
+
+import pytest
+from fastapi import BackgroundTasks
+from httpx import AsyncClient
+from pydantic import TypeAdapter
+from pytest_mock import MockerFixture
+
+from src.cache import redis_cache
+from src.cache.redis_cache import Cache, LocalCache, local_cache
+from tests.conftest import redis_test
+
+
+def test_local_cache_lru_and_ttl(mocker: MockerFixture):
+    cache = LocalCache(size=2, ttl=10, check_interval=1)
+    cache.add('a', 1)
+    cache.add('b', 2)
+    cache.get('a')
+    cache.add('c', 3)
+
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+
+    mocker.patch.object(time, 'monotonic', return_value=time.monotonic() + 11)
+    assert cache.get('a') is None
+
+
+@pytest.fixture
+def local_cache_enabled(mocker: MockerFixture) -> None:
+    mocker.patch.object(local_cache, 'size', 1000)
+
+
+async def test_cache_get_served_from_local_cache(local_cache_enabled: None, mocker: MockerFixture):
+    cache = Cache()
+    await cache.add(redis_test, 'local_key', {'title': 'menu'})
+    await cache.get(redis_test, 'local_key')
+    spy = mocker.spy(redis_test, 'get')
+
+    assert await cache.get(redis_test, 'local_key') == {'title': 'menu'}
+    assert spy.call_count == 0
+
+    assert await Cache(use_local=False).get(redis_test, 'local_key') == {'title': 'menu'}
+    assert spy.call_count == 1
+
+
+def test_local_cache_disabled_by_default():
+    assert not Cache().use_local
+
+
+async def test_local_cache_updated_by_own_add(local_cache_enabled: None):
+    cache = Cache()
+    await cache.add(redis_test, 'own_key', 'old')
+    assert await cache.get(redis_test, 'own_key') == 'old'
+
+    await cache.add(redis_test, 'own_key', 'new')
+    assert await cache.get(redis_test, 'own_key') == 'new'
+
+
+async def test_local_cache_cleared_by_other_process(local_cache_enabled: None, mocker: MockerFixture):
+    mocker.patch.object(local_cache, 'check_interval', 0)
+    cache = Cache()
+    await cache.add(redis_test, 'shared_key', 'old')
+    assert await cache.get(redis_test, 'shared_key') == 'old'
+
+    await redis_test.set('shared_key', pickle.dumps('new'))
+    assert await cache.get(redis_test, 'shared_key') == 'old'
+
+    await redis_test.incr('cache_version')
+    assert await cache.get(redis_test, 'shared_key') == 'new'
+
+
+async def test_delete_clears_local_cache(local_cache_enabled: None):
+    cache = Cache()
+    await cache.add(redis_test, 'deleted_key', 'value')
+    assert await cache.get(redis_test, 'deleted_key') == 'value'
+
+    await cache.delete(redis_test, 'deleted_key')
+
+    assert await cache.get(redis_test, 'deleted_key') is None
+
+
+async def test_cached_response_is_json_body(async_client: AsyncClient):
+    response = await async_client.post('/menus', json={'title': 'cached menu', 'description': 'desc'})
+    menu_id = response.json()['id']
+    first = await async_client.get('/menus')
+
+    assert json.loads(await redis_test.get('all')) == first.json()
+
+    second = await async_client.get('/menus')
+    assert second.headers['content-type'] == 'application/json'
+    assert second.content == first.content
+    assert second.json() == [{
+        'id': menu_id, 'title': 'cached menu', 'description': 'desc',
+        'submenus_count': 0, 'dishes_count': 0
+    }]
+
+
+async def test_delete_tree_by_tag(mocker: MockerFixture):
+    menu1, menu2 = str(uuid.uuid4()), str(uuid.uuid4())
+    submenu1, dish1 = str(uuid.uuid4()), str(uuid.uuid4())
+    keys = [menu1, f'{menu1}_all', f'{menu1}_{submenu1}', f'{menu1}_{submenu1}_{dish1}', menu2, 'all']
+    cache = Cache()
+    for key in keys:
+        await cache.add(redis_test, key, key)
+    scan = mocker.spy(redis_test, 'scan_iter')
+
+    batch = cache.batch(redis_test)
+    batch.delete('all')
+    batch.delete_tree(menu1)
+    await batch.flush()
+
+    assert [bool(await redis_test.exists(key)) for key in keys] == [False, False, False, False, True, False]
+    assert not await redis_test.exists(f'tag:{menu1}')
+    assert scan.call_count == 0
+
+    batch = cache.batch(redis_test)
+    batch.delete_tree(dish1)
+    await batch.flush()
+    assert not await redis_test.exists(f'tag:{dish1}')
+
+
+async def test_write_endpoints_redis_round_trips(async_client: AsyncClient, redis_round_trips: dict[str, int]):
+    round_trips = []
+
+    async def request(method: str, url: str, **kwargs: Any) -> Any:
+        redis_round_trips['count'] = 0
+        response = await async_client.request(method, url, **kwargs)
+        assert response.is_success
+        round_trips.append(redis_round_trips['count'])
+        return response.json()
+
+    body = {'title': 'round trips', 'description': 'desc'}
+    menu_id = (await request('POST', '/menus', json=body))['id']
+    await request('PATCH', f'/menus/{menu_id}', json=body)
+    submenu_id = (await request('POST', f'/menus/{menu_id}/submenus', json=body))['id']
+    await request('PATCH', f'/menus/{menu_id}/submenus/{submenu_id}', json=body)
+    dishes = f'/menus/{menu_id}/submenus/{submenu_id}/dishes'
+    dish_id = (await request('POST', dishes, json={**body, 'price': '10.5'}))['id']
+    await request('PATCH', f'{dishes}/{dish_id}', json={**body, 'price': '11.5'})
+    await request('DELETE', f'{dishes}/{dish_id}')
+    await request('DELETE', f'/menus/{menu_id}/submenus/{submenu_id}')
+    await request('DELETE', f'/menus/{menu_id}')
+
+    # one pipeline per request, one more to read tag sets of deleted subtrees
+    assert round_trips == [1, 1, 1, 1, 2, 1, 2, 2, 2]
+
+
+async def test_single_flight_builds_once():
+    calls = []
+
+    async def build() -> list[str]:
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return ['menu']
+
+    cache = Cache(use_local=False)
+    results = await asyncio.gather(*[
+        cache.get_json_or_build(redis_test, 'flight_key', build, TypeAdapter(list[str])) for _ in range(10)
+    ])
+
+    assert results == [b'["menu"]'] * 10
+    assert len(calls) == 1
+    assert not await redis_test.exists('lock:flight_key')
+
+
+async def test_single_flight_lock_of_crashed_builder_expires():
+    await redis_test.set('lock:crashed_key', 'crashed builder', px=200)
+    cache = Cache(use_local=False)
+
+    async def build() -> str:
+        return 'rebuilt'
+
+    start = time.monotonic()
+    assert await cache.get_json_or_build(redis_test, 'crashed_key', build, TypeAdapter(str)) == b'"rebuilt"'
+    assert 0.15 < time.monotonic() - start < cache.lock_wait
+    assert await redis_test.get('crashed_key') == b'"rebuilt"'
+
+
+async def test_single_flight_fenced_after_invalidation():
+    cache = Cache(use_local=False)
+
+    async def build() -> str:
+        await cache.delete(redis_test, 'fenced_key')
+        return 'outdated'
+
+    assert await cache.get_json_or_build(redis_test, 'fenced_key', build, TypeAdapter(str)) == b'"outdated"'
+    assert not await redis_test.exists('fenced_key')
+
+
+async def test_single_flight_fenced_after_subtree_invalidation():
+    menu_id, submenu_id = str(uuid.uuid4()), str(uuid.uuid4())
+    key = f'{menu_id}_{submenu_id}_all'
+    cache = Cache(use_local=False)
+    building, invalidated = asyncio.Event(), asyncio.Event()
+
+    async def build() -> list[str]:
+        building.set()
+        await invalidated.wait()
+        return ['outdated dish']
+
+    async def invalidate() -> None:
+        await building.wait()
+        batch = cache.batch(redis_test)
+        batch.delete_tree(menu_id)
+        await batch.flush()
+        invalidated.set()
+
+    data, _ = await asyncio.gather(
+        cache.get_json_or_build(redis_test, key, build, TypeAdapter(list[str])), invalidate()
+    )
+
+    assert data == b'["outdated dish"]'
+    assert not await redis_test.exists(key)
+    assert not await redis_test.exists(f'lock:{key}')
+
+
+async def test_single_flight_waiter_builds_after_wait(mocker: MockerFixture):
+    await redis_test.set('lock:slow_key', 'slow builder', px=10_000)
+    cache = Cache(use_local=False)
+    mocker.patch.object(cache, 'lock_wait', 0.1)
+
+    async def build() -> str:
+        return 'own'
+
+    assert await cache.get_json_or_build(redis_test, 'slow_key', build, TypeAdapter(str)) == b'"own"'
+    assert not await redis_test.exists('slow_key')
+    assert await redis_test.get('lock:slow_key') == b'slow builder'
+
+
+async def test_stale_marking_keeps_full_menu(mocker: MockerFixture):
+    mocker.patch.object(redis_cache, 'CACHE_STRICT_INVALIDATION', False)
+    await redis_test.set('full', 'stale menu')
+    await redis_test.set('full:fresh', 1)
+
+    await Cache().delete(redis_test, 'menus')
+
+    assert await redis_test.get('full') == b'stale menu'
+    assert not await redis_test.exists('full:fresh')
+
+
+async def test_strict_invalidation_deletes_full_menu():
+    await redis_test.set('full', 'stale menu')
+
+    await Cache().delete(redis_test, 'menus')
+
+    assert not await redis_test.exists('full')
+
+
+async def test_stale_served_while_revalidated():
+    await redis_test.set('swr_key', '"stale"')
+    background_tasks = BackgroundTasks()
+    cache = Cache(use_local=False)
+
+    async def build() -> str:
+        return 'fresh'
+
+    data = await cache.get_json_or_revalidate(redis_test, 'swr_key', build, TypeAdapter(str), 60, background_tasks)
+    assert data == b'"stale"'
+
+    await background_tasks()
+    assert await redis_test.get('swr_key') == b'"fresh"'
+    assert 0 < await redis_test.ttl('swr_key:fresh') <= 60
+    assert not await redis_test.exists('lock:swr_key')
+
+    data = await cache.get_json_or_revalidate(redis_test, 'swr_key', build, TypeAdapter(str), 60, BackgroundTasks())
+    assert data == b'"fresh"'
+
+
+async def test_stale_revalidated_once():
+    await redis_test.set('swr_busy_key', '"stale"')
+    await redis_test.set('lock:swr_busy_key', 'other builder', px=10_000)
+    background_tasks = BackgroundTasks()
+
+    async def build() -> str:
+        raise AssertionError('data is rebuilt by the lock holder')
+
+    data = await Cache(use_local=False).get_json_or_revalidate(
+        redis_test, 'swr_busy_key', build, TypeAdapter(str), 60, background_tasks
+    )
+    await background_tasks()
+
+    assert data == b'"stale"'
+    assert await redis_test.get('swr_busy_key') == b'"stale"'
+
+
+async def test_full_menu_stale_after_write(async_client: AsyncClient, mocker: MockerFixture):
+    mocker.patch.object(redis_cache, 'CACHE_STRICT_INVALIDATION', False)
+    response = await async_client.post('menus', json={'title': 'old title', 'description': 'description'})
+    menu_id = response.json()['id']
+
+    async def get_title() -> str:
+        response = await async_client.get('all_data')
+        return next(menu['title'] for menu in response.json() if menu['id'] == menu_id)
+
+    assert await get_title() == 'old title'
+
+    await async_client.patch(f'menus/{menu_id}', json={'title': 'new title', 'description': 'description'})
+
+    # stale body is served once, revalidated after the response
+    assert await get_title() == 'old title'
+    assert await get_title() == 'new title'
+    await async_client.delete(f'menus/{menu_id}')
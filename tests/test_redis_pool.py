@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from pytest_mock import MockerFixture
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError
+
+from src.cache.redis_pool import RedisPool
+from src.config import TEST_REDIS_HOST, TEST_REDIS_PORT
+from src.database import get_redis_client, redis_pool
+
+
+async def test_pool_reuses_connections():
+    pool = RedisPool(host=TEST_REDIS_HOST, port=TEST_REDIS_PORT, max_connections=4)
+    client = Redis(connection_pool=pool)
+
+    await asyncio.gather(*[client.ping() for _ in range(20)])
+    stats = pool.stats()
+    await pool.disconnect()
+
+    assert stats['created'] <= 4
+    assert stats['in_use'] == 0
+    assert stats['idle'] == stats['created']
+
+
+async def test_pool_counts_waits():
+    pool = RedisPool(host=TEST_REDIS_HOST, port=TEST_REDIS_PORT, max_connections=1, timeout=0.1)
+    connection = await pool.get_connection('PING')
+    assert pool.stats()['in_use'] == 1
+
+    with pytest.raises(ConnectionError):
+        await pool.get_connection('PING')
+    waiter = asyncio.create_task(pool.get_connection('PING'))
+    await asyncio.sleep(0.01)
+    await pool.release(connection)
+    await pool.release(await waiter)
+    stats = pool.stats()
+    await pool.disconnect()
+
+    assert stats['waits'] == 2
+    assert stats['wait_timeouts'] == 1
+
+
+async def test_redis_client_keeps_pool_open(mocker: MockerFixture):
+    disconnect = mocker.patch.object(redis_pool, 'disconnect')
+    async for client in get_redis_client():
+        assert client.connection_pool is redis_pool
+    disconnect.assert_not_called()
+
+
+async def test_get_redis_pool_stats(async_client: AsyncClient):
+    response = await async_client.get('stats/redis_pool')
+
+    assert response.status_code == 200
+    assert response.json() == redis_pool.stats()